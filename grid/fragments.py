@@ -0,0 +1,330 @@
+"""
+Caching of rendered grid block fragments.
+
+A block whose `cache_duration` is positive has its rendered HTML
+cached for that many seconds.  The cache key covers the block, its
+template, and the inputs that blocks commonly vary on (the current
+show, and the path and query string of the page).  Editing the block
+or its metadata changes the block's version, which is also in the
+key, so the edit shows straight away.
+
+Fragments are only shared between anonymous visitors, and never if
+they contain a CSRF token; blocks are always rendered afresh for
+logged in visitors, whose blocks may be personal.  Blocks opt out of
+caching altogether with a `cache_duration` of 0.
+
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils import timezone, translation
+
+from grid import signals
+from schedule.utils import now_playing
+
+
+# Whether grids render their blocks in parallel by default, the
+# number of rendering threads (and so database connections) each
+# process keeps for all its grids, how long a grid waits for its
+# blocks, and what replaces a block that isn't ready in time.
+PARALLEL_RENDERING = getattr(settings, 'GRID_PARALLEL_RENDERING', False)
+RENDER_THREADS = getattr(settings, 'GRID_RENDER_THREADS', 8)
+RENDER_TIMEOUT = getattr(settings, 'GRID_RENDER_TIMEOUT', 5)
+FALLBACK_FRAGMENT = getattr(
+    settings,
+    'GRID_FALLBACK_FRAGMENT',
+    '<div class="grid-block-unavailable"></div>'
+)
+
+# Whether grids send deferred blocks (see `is_deferred`) as
+# placeholders by default, and the names of blocks that are always
+# deferred (as well as those that poll) because they are slow.
+DEFERRED_DELIVERY = getattr(settings, 'GRID_DEFERRED_DELIVERY', False)
+DEFERRED_BLOCKS = getattr(settings, 'GRID_DEFERRED_BLOCKS', ())
+
+# The process's rendering pool, the ID of the process it belongs to,
+# and the lock guarding its creation.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def variant(request):
+    """
+    Returns the inputs, other than the block itself, that a block
+    fragment rendered for the given request may depend on.
+
+    """
+    return (
+        now_playing.current().expires.isoformat(),
+        request.get_full_path() if request is not None else '',
+    )
+
+
+def is_cacheable(block, request):
+    """
+    Returns True if the given block's fragment may be taken from, and
+    put into, the cache for the given request.
+
+    """
+    user = getattr(request, 'user', None)
+    # A timeout of 0 means 'the default timeout' to the cache, not
+    # 'don't cache', so this must be checked here.
+    return block.cache_duration > 0 and not (
+        user is not None and user.is_authenticated())
+
+
+def fragment_key(block, template, request):
+    """
+    Returns the cache key of the given block's fragment, as rendered
+    with the given template for the given request.
+
+    """
+    parts = (
+        [block.pk, template, signals.block_version(block.pk)]
+        + list(variant(request))
+    )
+    return 'grid_block:{0}'.format(hashlib.md5(
+        u':'.join(unicode(part) for part in parts).encode('utf-8')
+    ).hexdigest())
+
+
+def render(block, template, context_instance, request=None):
+    """
+    Renders the given block, with the given template, into the given
+    context, using the cached fragment if there is one.
+
+    :param block: the block to render
+    :type block: `GridBlock`
+    :param template: the path of the block's own template
+    :param context_instance: the context to render the block into
+    :param request: the request the block is being rendered for, if
+        any
+    :rtype: the rendered block, as a string
+
+    """
+    def build():
+        return render_to_string(
+            'grid/block_indirect.html',
+            {'box': block, 'template': template},
+            context_instance
+        )
+
+    if is_cacheable(block, request):
+        key = fragment_key(block, template, request)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = build()
+            # A fragment holding this visitor's CSRF token is theirs
+            # alone.  (This looks for the token rather than at flags
+            # on the request, as blocks may render in parallel.)
+            token = (request.META.get('CSRF_COOKIE')
+                     if request is not None else None)
+            if not (token and token in fragment):
+                cache.set(key, fragment, block.cache_duration)
+    else:
+        fragment = build()
+    return fragment
+
+
+def isolated(context_instance):
+    """
+    Returns a copy of the given context with its own stack of dicts,
+    so that a block pushing onto or changing its context (with
+    `{% with %}`, `{% for %}` and so on) can't affect other blocks
+    rendering at the same time.
+
+    """
+    context_copy = copy.copy(context_instance)
+    context_copy.dicts = [dict(layer) for layer in context_instance.dicts]
+    return context_copy
+
+
+def prepare(request):
+    """
+    Loads the lazily loaded parts of the given request (its user and
+    session), so that rendering threads only ever read them.
+
+    """
+    user = getattr(request, 'user', None)
+    if user is not None:
+        user.is_authenticated()
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session.items()
+
+
+def pool():
+    """
+    Returns this process's pool of RENDER_THREADS rendering threads,
+    creating it if needed.
+
+    The pool is made afresh in each process, as threads don't survive
+    forking servers' workers being forked.
+
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPool(RENDER_THREADS)
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def render_in_thread(block, template, context_instance, request,
+                     current_timezone, language, deadline):
+    """
+    As `render`, but for running in a rendering thread, which needs
+    the timezone and language of the request set up.
+
+    Blocks whose grid has stopped waiting for them by the time a
+    thread is free are skipped.  Each thread keeps its database
+    connection for the blocks it renders next, but ends its
+    transaction after every block, and drops the connection if a
+    block fails in case the connection is what broke.
+
+    """
+    if time.time() > deadline:
+        raise TimeoutError
+    timezone.activate(current_timezone)
+    translation.activate(language)
+    try:
+        fragment = render(block, template, context_instance, request)
+    except Exception:
+        connection.close()
+        raise
+    else:
+        transaction.rollback_unless_managed()
+        return fragment
+    finally:
+        timezone.deactivate()
+        translation.deactivate()
+
+
+def render_all(blocks, template_of, context_instance, request=None,
+               timeout=RENDER_TIMEOUT):
+    """
+    Renders the given blocks at the same time, using the process's
+    rendering threads (see `pool`).
+
+    Each block is rendered into its own copy of the given context.
+    Blocks that are not ready within 'timeout' seconds of the start,
+    or whose rendering fails, are replaced by FALLBACK_FRAGMENT.  Those
+    already rendering are left to finish in the background, filling
+    the fragment cache; those not yet started are skipped.
+
+    :param blocks: the blocks to render
+    :param template_of: a function giving the template of a block
+    :param context_instance: the context to render the blocks into
+    :param request: the request the blocks are being rendered for
+    :param timeout: how long to wait for the blocks, in seconds
+    :rtype: a dict mapping the blocks' primary keys to their
+        rendered fragments
+
+    """
+    blocks = list(blocks)
+    if not blocks:
+        return {}
+
+    if request is not None:
+        prepare(request)
+    current_timezone = timezone.get_current_timezone()
+    language = translation.get_language()
+
+    deadline = time.time() + timeout
+    render_pool = pool()
+    pending = [
+        (block, render_pool.apply_async(
+            render_in_thread,
+            (block,
+             template_of(block),
+             isolated(context_instance),
+             request,
+             current_timezone,
+             language,
+             deadline)
+        ))
+        for block in blocks
+    ]
+
+    fragments = {}
+    for block, result in pending:
+        try:
+            fragments[block.pk] = result.get(
+                max(0, deadline - time.time())
+            )
+        except TimeoutError:
+            fragments[block.pk] = FALLBACK_FRAGMENT
+        except Exception:
+            if settings.TEMPLATE_DEBUG:
+                raise
+            fragments[block.pk] = FALLBACK_FRAGMENT
+    return fragments
+
+
+## DEFERRED DELIVERY ##
+
+def is_deferred(block):
+    """
+    Returns True if the given block should be sent as a placeholder
+    and filled in by `block_raw`, rather than rendered inline, when
+    grids defer blocks.
+
+    Blocks that poll for updates, and those named in
+    GRID_DEFERRED_BLOCKS, are deferred.
+
+    """
+    return block.ajax_poll_duration > 0 or block.name in DEFERRED_BLOCKS
+
+
+def placeholder(block, request=None):
+    """
+    Returns the placeholder sent in place of a deferred block, or None
+    if the block can't be deferred (because `block_raw` can't be
+    reached by its name).
+
+    The placeholder gives the URL of the block's fragment and, if it
+    polls, the poll interval in milliseconds, for
+    grid/js/deferred_blocks.js to fill it in.  The first placeholder
+    sent for a request also loads that script.
+
+    """
+    try:
+        url = reverse('block_raw', kwargs={'block_id': block.name})
+    except NoReverseMatch:
+        return None
+
+    html = (
+        u'<div class="grid-block-placeholder" id="grid-block-{0}"'
+        u' data-block-url="{1}" data-poll="{2}"></div>'.format(
+            escape(block.name),
+            escape(url),
+            block.ajax_poll_duration * 1000
+        )
+    )
+    if request is None or not getattr(request, '_grid_loader_sent', False):
+        html += u'<script src="{0}" async></script>'.format(
+            escape(settings.STATIC_URL + 'grid/js/deferred_blocks.js')
+        )
+        if request is not None:
+            request._grid_loader_sent = True
+    return html
+
+
+def etag(fragment):
+    """Returns the (unquoted) ETag of the given rendered fragment."""
+    if isinstance(fragment, unicode):
+        fragment = fragment.encode('utf-8')
+    return hashlib.md5(fragment).hexdigest()
@@ -0,0 +1,102 @@
+"""
+Compiled grid layouts.
+
+A `GridLayout` holds everything needed to render a grid - the grid and
+its blocks in order with their positions - loaded in one query and
+cached until the grid, its block instances or its blocks change.
+
+Layouts do not carry block metadata: each block still looks up its
+own text metadata, through the metadata strand API, when it is
+rendered, so cached block fragments (see `grid.fragments`) are what
+save those queries.
+
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from grid import signals
+from grid.models import Grid, GridBlock, GridBlockInstance
+
+
+# How long, in seconds, compiled layouts are cached.  Edits discard
+# them straight away; this only bounds how long unused layouts stay
+# in the cache.
+LAYOUT_TIMEOUT = getattr(settings, 'GRID_LAYOUT_TIMEOUT', 60 * 60)
+
+
+class GridLayout(object):
+    """
+    A grid together with its blocks, in rendering order.
+
+    """
+    def __init__(self, grid, instances):
+        """
+        Compiles a layout.
+
+        :param grid: the grid
+        :type grid: `Grid`
+        :param instances: the grid's block instances, ordered by
+            position and with their blocks already retrieved
+        :type instances: iterable of `GridBlockInstance`
+
+        """
+        self.grid = grid
+        self.instances = list(instances)
+        self.blocks = [instance.grid_block for instance in self.instances]
+        self.blocks_by_id = {}
+        for block in self.blocks:
+            self.blocks_by_id[block.pk] = block
+            self.blocks_by_id[unicode(block.pk)] = block
+            self.blocks_by_id[block.name] = block
+        # Let templates calling ordered_list use these blocks.
+        grid._ordered_list = self.blocks
+
+    def block(self, block_id):
+        """
+        Returns the block in this layout with the given ID (name or
+        primary key), or None if there is no such block.
+
+        """
+        if isinstance(block_id, GridBlock):
+            block_id = block_id.pk
+        return self.blocks_by_id.get(block_id)
+
+
+def compile_layout(grid):
+    """
+    Compiles the layout of the given grid.
+
+    This takes one query for the blocks.
+
+    """
+    instances = (GridBlockInstance.objects
+                 .filter(grid=grid)
+                 .select_related('grid_block')
+                 .order_by('y', 'x'))
+    return GridLayout(grid, instances)
+
+
+def layout_key(grid_id):
+    """Returns the cache key of the layout of the given grid."""
+    return 'grid_layout:{0}'.format(hashlib.md5(
+        u'{0}:{1}'.format(signals.layout_version(), grid_id).encode('utf-8')
+    ).hexdigest())
+
+
+def load(grid_id):
+    """
+    Returns the compiled layout of the grid with the given ID (name or
+    primary key), or None if there is no such grid.
+
+    """
+    key = layout_key(grid_id)
+    layout = cache.get(key)
+    if layout is None:
+        grid = Grid.get_if_exists(grid_id)
+        if grid is not None:
+            layout = compile_layout(grid)
+            cache.set(key, layout, LAYOUT_TIMEOUT)
+    return layout
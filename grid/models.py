@@ -146,11 +146,15 @@ class Grid(Type):
         This grid has instances for
         Ordered Y then X
         """
-        return GridBlock.objects.in_bulk(
-            self.gridblockinstance_set.all().values_list(
-                'grid_block', flat=True
-            )
-        ).values()
+        # Compiled layouts (see grid.layouts) fill this in.
+        if '_ordered_list' not in self.__dict__:
+            self._ordered_list = [
+                instance.grid_block
+                for instance in self.gridblockinstance_set
+                .select_related('grid_block')
+                .order_by('y', 'x')
+            ]
+        return self._ordered_list
 
     class Meta(Type.Meta):
         db_table = 'grid'
@@ -189,3 +193,7 @@ class GridBlockInstance(models.Model):
         ordering = ('y', 'x')
 
     id = exts.primary_key_from_meta(Meta)
+
+
+# Connect the fragment and layout cache invalidation signals.
+import grid.signals
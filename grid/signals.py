@@ -0,0 +1,74 @@
+"""
+Cache versions for the grid system, and the signal receivers that
+bump them when grids, blocks or block metadata change.
+
+The rendered block fragments (see `grid.fragments`) and compiled grid
+layouts (see `grid.layouts`) put these versions in their cache keys,
+so bumping a version discards everything cached under it.  This
+module is kept light, as the grid models import it to connect the
+receivers.
+
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from grid.models import Grid, GridBlock, GridBlockInstance
+from grid.models import GridBlockTextMetadata
+from urysite import cache_versions
+from urysite import model_extensions as exts
+
+
+# The cache key of the version shared by all layouts.
+LAYOUT_VERSION_CACHE_KEY = 'grid_layout_version'
+
+
+def block_version_key(block_id):
+    """Returns the cache key of the given block's version."""
+    return 'grid_block_version:{0}'.format(block_id)
+
+
+def block_version(block_id):
+    """Returns the current version of the given block."""
+    return cache_versions.current(block_version_key(block_id))
+
+
+def layout_version():
+    """Returns the current version of all layouts."""
+    return cache_versions.current(LAYOUT_VERSION_CACHE_KEY)
+
+
+def block_id_of(metadatum):
+    """Returns the ID of the block the given block metadatum is on."""
+    field = exts.link_field(type(metadatum), GridBlock)
+    return None if field is None else getattr(metadatum, field.attname)
+
+
+@receiver(post_save, sender=GridBlock)
+@receiver(post_delete, sender=GridBlock)
+def invalidate_block(sender, instance, **kwargs):
+    """Discards a block's cached fragments when it is edited."""
+    cache_versions.bump(block_version_key(instance.pk))
+
+
+@receiver(post_save, sender=GridBlockTextMetadata)
+@receiver(post_delete, sender=GridBlockTextMetadata)
+def invalidate_block_metadata(sender, instance, **kwargs):
+    """
+    Discards a block's cached fragments when its metadata is edited.
+
+    """
+    block_id = block_id_of(instance)
+    if block_id is not None:
+        cache_versions.bump(block_version_key(block_id))
+
+
+@receiver(post_save, sender=Grid)
+@receiver(post_delete, sender=Grid)
+@receiver(post_save, sender=GridBlockInstance)
+@receiver(post_delete, sender=GridBlockInstance)
+@receiver(post_save, sender=GridBlock)
+@receiver(post_delete, sender=GridBlock)
+def invalidate_layouts(sender, **kwargs):
+    """Discards all compiled layouts whenever a grid changes."""
+    cache_versions.bump(LAYOUT_VERSION_CACHE_KEY)
@@ -0,0 +1,50 @@
+/*
+ * Fills in deferred grid blocks.
+ *
+ * Grids that defer blocks send placeholders of the form
+ *
+ *   <div class="grid-block-placeholder" data-block-url="..."
+ *        data-poll="...">
+ *
+ * This fetches each placeholder's block from its block_raw URL and
+ * swaps it in.  If data-poll is positive, the block is fetched again
+ * every that many milliseconds; block_raw sends ETags, so unchanged
+ * blocks cost a 304.
+ */
+(function () {
+    'use strict';
+
+    function load(placeholder) {
+        var request = new XMLHttpRequest();
+        request.onreadystatechange = function () {
+            if (request.readyState === 4 && request.status === 200) {
+                placeholder.innerHTML = request.responseText;
+            }
+        };
+        request.open('GET', placeholder.getAttribute('data-block-url'), true);
+        request.send();
+    }
+
+    function start() {
+        var placeholders = document.querySelectorAll(
+            '.grid-block-placeholder:not([data-loaded])'
+        ), i, placeholder, poll;
+
+        for (i = 0; i < placeholders.length; i += 1) {
+            placeholder = placeholders[i];
+            placeholder.setAttribute('data-loaded', 'true');
+            load(placeholder);
+
+            poll = parseInt(placeholder.getAttribute('data-poll'), 10);
+            if (poll > 0) {
+                setInterval(load.bind(null, placeholder), poll);
+            }
+        }
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+}());
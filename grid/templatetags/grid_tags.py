@@ -5,36 +5,60 @@ Template tags for the `grid` system.
 
 from django import template
 
-from grid import views
-from grid.models import GridBlock, Grid
+from grid import fragments, layouts, views
+from grid.models import GridBlock
 
 register = template.Library()
 
 
-@register.inclusion_tag('grid/block_indirect.html', takes_context=True)
+@register.simple_tag(takes_context=True)
 def grid_block(context, block_id):
     """
     Renders the grid block of the given ID.
 
+    Blocks with a `cache_duration` are served from the fragment cache
+    where possible; see `grid.fragments`.  If the enclosing grid
+    defers blocks, slow and polling blocks are replaced by
+    placeholders to be filled in from `block_raw`.
+
     :param block_id: the ID (name or primary key) of the block
     :type block_id: string, integer or `GridBlock`
-    :rtype: a template tag node
+    :rtype: the rendered block
 
     """
-    # Effectively pass the entire existing context with the
-    # difference that 'box' is set to the block ID and 'template' to
+    # Effectively render with the entire existing context with the
+    # difference that 'box' is set to the block and 'template' to
     # the actual template block_indirect should render.
     # This is required for embedded views to work properly, just
-    # returning a context of {'box': GridBlock.get(block_id)} causes
-    # embedded views to break.
-    box = GridBlock.get(block_id)
-    context['box'] = box
-    context['template'] = views.template_of(box)
-    return context
+    # rendering with a context of {'box': GridBlock.get(block_id)}
+    # causes embedded views to break.
+    layout = context.get('grid_layout')
+    box = layout.block(block_id) if layout is not None else None
+    if box is None:
+        box = GridBlock.get(block_id)
+    rendered = context.get('rendered_blocks', {})
+    fragment = None
+    if (context.get('defer_blocks', fragments.DEFERRED_DELIVERY)
+            and fragments.is_deferred(box)):
+        # If the block can't be deferred, it is rendered inline.
+        fragment = fragments.placeholder(box, context.get('request'))
+    if fragment is None and box.pk in rendered:
+        fragment = rendered[box.pk]
+    elif fragment is None:
+        fragment = fragments.render(
+            box,
+            views.template_of(box),
+            context,
+            context.get('request')
+        )
+    return fragment
 
 
 @register.inclusion_tag('grid/grid.html', takes_context=True)
-def grid(context, grid_id):
+def grid(context,
+         grid_id,
+         parallel=fragments.PARALLEL_RENDERING,
+         deferred=fragments.DEFERRED_DELIVERY):
     """
     Renders the grid of the given ID.
 
@@ -42,13 +66,39 @@ def grid(context, grid_id):
     sequence; you will generally want to ensure that your grid CSS
     automatically breaks the grid stream into rows and columns.
 
+    If 'parallel' is True, the blocks are rendered at the same time
+    before the grid is (see `grid.fragments.render_all`), so the grid
+    takes about as long as its slowest block rather than the sum of
+    all of them.
+
+    If 'deferred' is True, slow and polling blocks (see
+    `grid.fragments.is_deferred`) are sent as placeholders for the
+    page to fill in from `block_raw`, so they neither hold up the page
+    nor stop it being cached.
+
     :param grid_id: the ID (name or primary key) of the grid
     :type grid_id: string, integer or `GridBlock`
+    :param parallel: whether to render the blocks in parallel
+        (default: the GRID_PARALLEL_RENDERING setting)
+    :param deferred: whether to defer slow and polling blocks
+        (default: the GRID_DEFERRED_DELIVERY setting)
     :rtype: a template tag node
 
     """
     # As grid_block and for the same reasons, but obviously with
-    # 'grid' instead of 'box'.
-    context['grid'] = Grid.get_if_exists(grid_id)
+    # 'grid' instead of 'box'.  The grid and its blocks come from the
+    # compiled layout (see grid.layouts), which grid_block also uses.
+    layout = layouts.load(grid_id)
+    context['grid_layout'] = layout
+    context['grid'] = layout.grid if layout is not None else None
     context['grid_id'] = grid_id
+    context['defer_blocks'] = deferred
+    if parallel and layout is not None:
+        context['rendered_blocks'] = fragments.render_all(
+            [block for block in layout.blocks
+             if not (deferred and fragments.is_deferred(block))],
+            views.template_of,
+            context,
+            context.get('request')
+        )
     return context
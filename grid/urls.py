@@ -3,7 +3,7 @@ from django.conf.urls import patterns, url
 
 urlpatterns = patterns(
     'grid.views',
-    url(r'^raw/(?P<block_id>[a-zA-Z-_]+)$',
+    url(r'^raw/(?P<block_id>[^/]+)$',
         'block_raw',
         name='block_raw'),
 )
@@ -3,8 +3,12 @@ Views for the dynamic grid system.
 
 """
 
-from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template import RequestContext
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 
+from grid import fragments
 from grid.models import GridBlock
 
 
@@ -33,15 +37,33 @@ def block_raw(request, block_id):
     :param block_id: the identifier of the block (usually its name)
     :type block_id: string, integer or `GridBlock`
     :rtype: the result of calling the block's view with this request
+
+    Blocks with a `cache_duration` are served from the fragment cache
+    where possible; see `grid.fragments`.  This is also how deferred
+    blocks are filled in, so the response carries an ETag (answering
+    If-None-Match with 304) and may be cached for the block's
+    `cache_duration`.
     """
 
     block = GridBlock.get_or_404(block_id)
 
-    return render(
-        request,
-        'grid/block_indirect.html',
-        {
-            'box': block,
-            'template': template_of(block),
-        }
+    fragment = fragments.render(
+        block,
+        template_of(block),
+        RequestContext(request),
+        request
     )
+    etag = fragments.etag(fragment)
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(fragment)
+    response['ETag'] = quote_etag(etag)
+    patch_cache_control(response, max_age=max(0, block.cache_duration))
+    if request.user.is_authenticated():
+        # Logged in visitors' blocks are rendered just for them.
+        patch_cache_control(response, private=True)
+    # Fragments can differ for logged in visitors.
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -5,7 +5,14 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+import threading
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from laconia.views import now_playing_events, now_playing_etag
+from schedule.utils import now_playing, revision
 
 
 class SimpleTest(TestCase):
@@ -14,3 +21,94 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class NowPlayingEventListeners(TestCase):
+    """
+    A harness simulating many concurrent listeners on the now-playing
+    event stream.
+
+    """
+    LISTENERS = 300
+
+    def setUp(self):
+        """
+        Stands in a fixed, empty now-playing snapshot for the real
+        one, which needs a populated schedule.
+
+        """
+        now = timezone.now()
+        self.snapshot = now_playing.NowPlaying(
+            now,
+            None,
+            None,
+            None,
+            None,
+            now + timedelta(hours=1)
+        )
+        self.real_current = now_playing.current
+        now_playing.current = lambda: self.snapshot
+
+    def tearDown(self):
+        now_playing.current = self.real_current
+
+    def listen(self, results, last_event_id=None):
+        """
+        Runs one listener until its first event or keep-alive, without
+        sleeping, and appends what it received to 'results'.
+
+        """
+        stream = now_playing_events(
+            last_event_id,
+            lifetime=0,
+            sleep=lambda seconds: None
+        )
+        next(stream)  # retry
+        results.append(next(stream))
+
+    def run_listeners(self, last_event_id=None):
+        """Runs LISTENERS listeners at once, returning what they got."""
+        results = []
+        threads = [
+            threading.Thread(
+                target=self.listen,
+                args=(results, last_event_id)
+            )
+            for _ in xrange(self.LISTENERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_listeners_share_one_event(self):
+        """
+        Tests that every new listener gets the same now-playing event.
+
+        """
+        results = self.run_listeners()
+        self.assertEqual(len(results), self.LISTENERS)
+        self.assertEqual(len(set(results)), 1)
+        self.assertTrue(results[0].startswith('id: '))
+
+    def test_up_to_date_listeners_get_keep_alives(self):
+        """
+        Tests that listeners that have seen the current event are only
+        sent keep-alives.
+
+        """
+        results = self.run_listeners(now_playing_etag())
+        self.assertEqual(set(results), set([': keep-alive\n\n']))
+
+    def test_schedule_change_sends_new_event(self):
+        """
+        Tests that a change to the schedule sends listeners a new event.
+
+        """
+        seen = now_playing_etag()
+        revision.bump()
+        results = self.run_listeners(seen)
+        self.assertEqual(len(set(results)), 1)
+        self.assertTrue(results[0].startswith('id: '))
+        self.assertFalse(results[0].startswith('id: {0}\n'.format(seen)))
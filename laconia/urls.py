@@ -10,6 +10,9 @@ urlpatterns = patterns(
     url(r'^current-show-and-next/$',
         'current_show_and_next',
         name='current_show_and_next'),
+    url(r'^current-show-and-next/events/$',
+        'current_show_and_next_events',
+        name='current_show_and_next_events'),
     url(r'^range/{0}/(?P<start>[0-9]+)/(?P<end>[0-9]+.)/$'
         .format(APP_MODEL_REGEX),
         'range',
@@ -3,18 +3,74 @@ from metadata.utils.date_range import in_range
 from django.shortcuts import render
 from django.utils import simplejson
 from django.http import Http404, HttpResponse
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    # Django 1.4 has no StreamingHttpResponse, but its HttpResponse
+    # streams an iterator given as its content.
+    StreamingHttpResponse = HttpResponse
 from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 
-from schedule.utils import range as s_range
+from metadata.mixins import MetadataSubjectMixin
+from metadata.utils.prefetch import prefetch
+from people.mixins import CreditableMixin
+from people.utils.by_lines import by_lines
+from schedule.models import Timeslot
+from schedule.utils import now_playing, revision
 
 import csv
+import hashlib
 import json
+import time
 
 
 # This is used to limit range_XYZ requests to prevent them from
 # DoSing URY accidentally.
 MAX_RANGE_LENGTH = 10 * 24 * 60 * 60  # Ten days
 
+# Trusted consumers (such as the logging and compliance tools) may ask
+# for longer ranges, as the range outputs are streamed.
+TRUSTED_MAX_RANGE_LENGTH = getattr(
+    settings,
+    'LACONIA_TRUSTED_MAX_RANGE_LENGTH',
+    366 * 24 * 60 * 60  # A (leap) year
+)
+
+# The remote addresses of trusted consumers.
+TRUSTED_ADDRESSES = getattr(settings, 'LACONIA_TRUSTED_ADDRESSES', ())
+
+# The fields that range queries can return, and those returned by
+# default by each format.  Clients can ask for fewer with 'fields=',
+# which saves looking up the metadata and credits they don't need.
+RANGE_FIELDS = ('id', 'start', 'end', 'title', 'description', 'by_line')
+DEFAULT_RANGE_FIELDS = {
+    'csv': RANGE_FIELDS,
+    'json': ('id', 'title', 'start', 'end'),
+}
+
+# The number of range items whose metadata and credits are retrieved
+# together.
+RANGE_CHUNK_SIZE = 100
+
+# How often, in seconds, now-playing event streams check for changes,
+# and how long each stream lasts before the client has to reconnect.
+EVENT_CHECK_INTERVAL = getattr(settings, 'LACONIA_EVENT_CHECK_INTERVAL', 15)
+EVENT_STREAM_LIFETIME = getattr(
+    settings,
+    'LACONIA_EVENT_STREAM_LIFETIME',
+    5 * 60
+)
+
+# How long, in milliseconds, clients wait before reconnecting to a
+# closed event stream.
+EVENT_RETRY_MILLISECONDS = 1000
+
+# The most recent now-playing event, as (event ID, event), shared by
+# all of this process's event streams.
+_now_playing_event = (None, None)
+
 
 def laconia_error(request, message, status=403):
     """
@@ -42,44 +98,200 @@ def current_show_location_and_time(request):
     )
 
 
-def current_show_and_next(request):
-    """Sends info about the current show as JSON."""
+def schedule_etag(*parts):
+    """
+    Returns an ETag for a response built from the schedule, which
+    changes whenever the schedule (or its metadata) does, and with
+    the given parts.
+
+    """
+    return hashlib.md5(revision.key(*parts).encode('utf-8')).hexdigest()
+
+
+def now_playing_etag():
+    """
+    Returns the ETag of the current now-playing info.
+
+    As well as with the schedule, this changes at every show boundary.
+
+    """
+    return schedule_etag(
+        'laconia_now_next',
+        now_playing.current().expires.isoformat()
+    )
+
+
+def current_show_and_next_etag(request):
+    """Returns the ETag of the current `current_show_and_next` response."""
+    return now_playing_etag()
+
+
+def cache_until_next_show(view):
+    """
+    Decorates a view so that its responses, including 304s, may be
+    cached until the current show ends.
+
+    """
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_cache_control(
+            response,
+            max_age=now_playing.current().seconds_left()
+        )
+        return response
+    return wrapped
+
+
+def show_image(timeslot):
+    """
+    Returns the URL of the player image for the given timeslot, or the
+    default player image if it has none.
+
+    Timeslots don't necessarily support player images, so this asks
+    for one as `range_item_value` asks for optional fields.
+
+    """
+    image = getattr(timeslot, 'player_image', None)
+    if callable(image):
+        image = image()
+    if image:
+        url = getattr(image, 'url', image)
+    else:
+        url = settings.STATIC_URL + "img/default_show_player.png"
+    return url
+
+
+def current_show_and_next_data():
+    """Returns a dict of info about the current and next shows."""
     # In case the worst happens and the schedule doesn't come back with
     # two items, we're very cautious about the size of day.
-    day = list(s_range.day(limit=2))
+    day = now_playing.current().shows()
 
     json_data = {}
     if len(day) >= 1:
         on_air = day[0]
-        if on_air.player_image:
-            image = on_air.player_image.url
-        else:
-            image = settings.STATIC_URL + "img/default_show_player.png"
         json_data.update(
             {
-                "onAir": on_air.title,
-                "onAirDesc": on_air.description,
+                "onAir": on_air.title(),
+                "onAirDesc": on_air.description(),
                 "onAirPres": on_air.by_line(),
                 "onAirTime": '{:%H:%M} - {:%H:%M}'.format(
-                    on_air.start_time, on_air.end_time
+                    on_air.start_time, on_air.end_time()
                 ),
-                "onAirImg": image,
+                "onAirImg": show_image(on_air),
             }
         )
     if len(day) >= 2:
         up_next = day[1]
         json_data.update(
             {
-                "upNext": up_next.title,
-                "upNextDesc": up_next.description,
+                "upNext": up_next.title(),
+                "upNextDesc": up_next.description(),
                 "upNextPres": up_next.by_line(),
                 "upNextTime": '{:%H:%M} - {:%H:%M}'.format(
-                    up_next.start_time, up_next.end_time
+                    up_next.start_time, up_next.end_time()
                 )
             }
         )
+    return json_data
+
+
+@cache_until_next_show
+@condition(etag_func=current_show_and_next_etag)
+def current_show_and_next(request):
+    """Sends info about the current show as JSON."""
     return HttpResponse(
-        simplejson.dumps(json_data), content_type="application/json"
+        simplejson.dumps(current_show_and_next_data()),
+        content_type="application/json"
+    )
+
+
+def now_playing_event(last_event_id=None):
+    """
+    Returns the server-sent event announcing the current and next
+    shows, or None if it would have the given event ID (that is, the
+    listener has already seen it).
+
+    The event is worked out once per change and shared between all
+    listeners in this process.
+
+    """
+    global _now_playing_event
+    event_id = now_playing_etag()
+    event = None
+    if event_id != last_event_id:
+        cached_id, event = _now_playing_event
+        if cached_id != event_id:
+            event = 'id: {0}\nevent: nowplaying\ndata: {1}\n\n'.format(
+                event_id,
+                simplejson.dumps(current_show_and_next_data())
+            )
+            _now_playing_event = (event_id, event)
+    return event_id, event
+
+
+def now_playing_events(last_event_id=None,
+                       lifetime=EVENT_STREAM_LIFETIME,
+                       sleep=time.sleep):
+    """
+    Yields the server-sent event stream of changes to the current and
+    next shows, starting with the current state unless the listener
+    has already seen it.
+
+    Between events, the stream only checks the (cached) now-playing
+    snapshot every EVENT_CHECK_INTERVAL seconds, or at the next show
+    boundary if that is sooner, sending a comment as a keep-alive.
+    It ends after 'lifetime' seconds; clients reconnect by themselves,
+    sending the last event ID.
+
+    """
+    yield 'retry: {0}\n\n'.format(EVENT_RETRY_MILLISECONDS)
+    deadline = time.time() + lifetime
+    while True:
+        last_event_id, event = now_playing_event(last_event_id)
+        yield event if event is not None else ': keep-alive\n\n'
+
+        left = deadline - time.time()
+        if left <= 0:
+            break
+        sleep(min(
+            left,
+            EVENT_CHECK_INTERVAL,
+            # Wake just after the boundary, not just before it.
+            now_playing.current().seconds_left() + 1
+        ))
+
+
+def current_show_and_next_events(request):
+    """
+    Sends info about the current and next shows as a stream of
+    server-sent events, one whenever either changes (including when
+    their metadata is edited).
+
+    This lets clients listen for changes instead of polling
+    `current_show_and_next`.  Each open stream holds a worker, so this
+    is meant for deployments on an asynchronous (for example, gevent)
+    worker class.
+
+    """
+    response = StreamingHttpResponse(
+        now_playing_events(request.META.get('HTTP_LAST_EVENT_ID')),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def max_range_length(request):
+    """
+    Returns the longest range, in seconds, that the given request may
+    ask for.
+
+    """
+    return (
+        TRUSTED_MAX_RANGE_LENGTH
+        if request.META.get('REMOTE_ADDR') in TRUSTED_ADDRESSES
+        else MAX_RANGE_LENGTH
     )
 
 
@@ -105,6 +317,42 @@ def range_querystring(request, appname, modelname, format='json'):
     )
 
 
+def range_etag(request, appname, modelname, start, end, format='csv'):
+    """
+    Returns the ETag of a `range` response, or None if the response
+    would not be a successful one or the model is not part of the
+    schedule and so has no revision to go by.
+
+    The ETag covers whether the caller is trusted, as that changes
+    which ranges are allowed.
+
+    """
+    try:
+        length = int(end) - int(start)
+    except ValueError:
+        length = None
+    max_length = max_range_length(request)
+
+    if appname != 'schedule' or get_model(appname, modelname) is None:
+        etag = None
+    elif length is None or not 0 <= length <= max_length:
+        # Errors are not cached, so should not be revalidated.
+        etag = None
+    else:
+        etag = schedule_etag(
+            'laconia_range',
+            appname,
+            modelname,
+            start,
+            end,
+            format,
+            max_length,
+            request.GET.get('fields', '').replace(' ', '')
+        )
+    return etag
+
+
+@condition(etag_func=range_etag)
 def range(request, appname, modelname, start, end, format='csv'):
     """
     Retrieves a summary about any items in the given model that fall
@@ -128,6 +376,14 @@ def range(request, appname, modelname, start, end, format='csv'):
     If the model supports credit queries, the by-line will also be
     added.
 
+    The 'fields' query string parameter, a comma-separated subset of
+    RANGE_FIELDS, restricts the output to those fields.  Metadata and
+    credits are retrieved in bulk, and only if asked for.
+
+    Responses for schedule models carry an ETag based on the schedule
+    revision, and If-None-Match requests for an unchanged schedule
+    get a 304 without the range being queried.
+
     """
     model = get_model(appname, modelname)
     if model is None:
@@ -135,6 +391,7 @@ def range(request, appname, modelname, start, end, format='csv'):
 
     start = int(start)
     end = int(end)
+    max_length = max_range_length(request)
 
     # Request sanity checking
     if (end - start) < 0:
@@ -142,11 +399,11 @@ def range(request, appname, modelname, start, end, format='csv'):
             request,
             'Requested range is negative.'
         )
-    elif (end - start) > MAX_RANGE_LENGTH:
+    elif (end - start) > max_length:
         response = laconia_error(
             request,
             'Requested range is too long (max: {0} seconds)'.format(
-                MAX_RANGE_LENGTH
+                max_length
             )
         )
     else:
@@ -169,11 +426,127 @@ def range(request, appname, modelname, start, end, format='csv'):
             f = range_json
         else:
             raise ValueError('Invalid format specifier.')
-        response = f(filename, items)
+        response = f(filename, items, range_fields(request, format))
     return response
 
 
-def range_csv(filename, items):
+def range_fields(request, format):
+    """
+    Returns the fields asked for in the given range request, in the
+    order of RANGE_FIELDS.
+
+    """
+    if 'fields' in request.GET:
+        asked = request.GET['fields'].split(',')
+        fields = tuple(field for field in RANGE_FIELDS if field in asked)
+    else:
+        fields = DEFAULT_RANGE_FIELDS[format]
+    return fields
+
+
+class Echo(object):
+    """
+    A file-like object that hands back whatever is written to it, so
+    that csv.writer can be used to produce rows one at a time.
+
+    """
+    def write(self, value):
+        return value
+
+
+def range_items(items, fields):
+    """
+    Iterates over range items without keeping them all in memory, if
+    they are a QuerySet.
+
+    The items are taken in chunks of RANGE_CHUNK_SIZE, and the
+    metadata and by-lines among the given fields are retrieved for
+    each chunk in bulk.
+
+    """
+    if getattr(items, 'model', None) is Timeslot:
+        # Metadata inheritance and credits both go through each
+        # timeslot's season and show, so fetch those with the rows.
+        items = items.select_related('season__show')
+    items = items.iterator() if hasattr(items, 'iterator') else iter(items)
+    keys = [key for key in ('title', 'description') if key in fields]
+
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == RANGE_CHUNK_SIZE:
+            for enriched in range_enrich(chunk, keys, fields):
+                yield enriched
+            chunk = []
+    for enriched in range_enrich(chunk, keys, fields):
+        yield enriched
+
+
+def range_enrich(chunk, keys, fields):
+    """
+    Retrieves the given metadata keys and, if asked for, the by-lines
+    of a chunk of range items in bulk, and returns the chunk.
+
+    """
+    if chunk and isinstance(chunk[0], MetadataSubjectMixin) and keys:
+        prefetch(chunk, keys)
+    if chunk and isinstance(chunk[0], CreditableMixin) and (
+            'by_line' in fields):
+        by_lines(chunk)
+    return chunk
+
+
+def range_item_value(item, field):
+    """
+    Returns the value of the given field (one of RANGE_FIELDS) for the
+    given range item.
+
+    Fields the item doesn't support are blank.
+
+    """
+    if field == 'id':
+        value = item.pk
+    elif field == 'start':
+        value = item.range_start_unix()
+    elif field == 'end':
+        value = item.range_end_unix()
+    elif field == 'title':
+        value = range_item_title(item)
+    else:
+        value = getattr(item, field, '')
+    return value() if callable(value) else value
+
+
+def range_item_row(item, fields):
+    """
+    Returns the CSV row representing the given range item; see
+    `range_csv`.
+
+    The Python 2 csv module can't write Unicode, so text cells are
+    encoded as UTF-8.
+
+    """
+    row = []
+    for field in RANGE_FIELDS:
+        value = range_item_value(item, field) if field in fields else ''
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        row.append(value)
+    return row
+
+
+def range_csv_rows(items, fields):
+    """
+    Yields the rows of a range query result in CSV format, one line
+    at a time.
+
+    """
+    writer = csv.writer(Echo())
+    for item in range_items(items, fields):
+        yield writer.writerow(range_item_row(item, fields))
+
+
+def range_csv(filename, items, fields=RANGE_FIELDS):
     """
     Returns a range query result in CSV format.
 
@@ -188,23 +561,18 @@ def range_csv(filename, items):
        else blank
     6) By-line, if credits exist; else blank
 
+    Fields not in 'fields' are left blank.
+
+    The CSV is streamed as the items are retrieved.
+
     """
-    response = HttpResponse(mimetype='text/csv')
+    response = StreamingHttpResponse(
+        range_csv_rows(items, fields),
+        content_type='text/csv; charset=utf-8'
+    )
     response['Content-Disposition'] = (
         u'attachment; filename="{0}.csv"'.format(filename)
     )
-    writer = csv.writer(response)
-
-    for item in items:
-        writer.writerow([
-            item.pk,
-            item.range_start_unix(),
-            item.range_end_unix(),
-            getattr(item, 'title', ''),
-            getattr(item, 'description', ''),
-            getattr(item, 'by_line', lambda x: '')()
-        ])
-
     return response
 
 
@@ -220,21 +588,16 @@ def range_item_title(item):
     return getattr(item, 'title', '')
 
 
-def range_item_dict(item):
+def range_item_dict(item, fields=DEFAULT_RANGE_FIELDS['json']):
     """
     Returns a dictionary representing the information from a given
     range item that is pertinent to a range query.
 
     """
-    return {
-        'id': item.pk,
-        'title': range_item_title(item),
-        'start': item.range_start_unix(),
-        'end': item.range_end_unix(),
-    }
+    return dict((field, range_item_value(item, field)) for field in fields)
 
 
-def range_json(filename, items):
+def range_json(filename, items, fields=DEFAULT_RANGE_FIELDS['json']):
     """
     Returns a range query in JSON (full-calendar) format.
 
@@ -246,8 +609,23 @@ def range_json(filename, items):
     start time of the item; else the item's Unicode representation
     will be returned.
 
+    The JSON is streamed as the items are retrieved.
+
     """
-    return HttpResponse(
-        json.dumps(map(range_item_dict, items)),
-        mimetype='application/json'
+    return StreamingHttpResponse(
+        range_json_chunks(items, fields),
+        content_type='application/json'
     )
+
+
+def range_json_chunks(items, fields):
+    """
+    Yields a range query result in JSON format, one item at a time.
+
+    """
+    yield '['
+    separator = ''
+    for item in range_items(items, fields):
+        yield separator + json.dumps(range_item_dict(item, fields))
+        separator = ', '
+    yield ']'
@@ -0,0 +1,52 @@
+"""Version counters kept in the cache.
+
+Anything cached under a key that includes a version is discarded all
+at once by changing the version: the old keys are simply never looked
+up again, and age out of the cache by themselves.
+
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+# How long, in seconds, versions are kept.  This is as long as
+# possible; losing a version is harmless (see 'initial') but throws
+# away everything cached under it.
+VERSION_TIMEOUT = 60 * 60 * 24 * 365
+
+
+def initial():
+    """Returns a new starting value for a version.
+
+    This is taken from the clock, so that if a version is ever evicted
+    from the cache, it restarts from a value that has (almost
+    certainly) not been used before.
+
+    """
+    return int(time.time() * 1000)
+
+
+def current(key):
+    """Returns the version stored under the given cache key, starting
+    it if there is none.
+
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, initial(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump(key):
+    """Changes the version stored under the given cache key,
+    discarding everything cached under the previous version.
+
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version isn't in the cache, so start a new one.
+        cache.set(key, initial(), VERSION_TIMEOUT)
@@ -0,0 +1 @@
+# Blank
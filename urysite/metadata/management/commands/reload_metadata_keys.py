@@ -0,0 +1,23 @@
+"""The 'reload_metadata_keys' management command, which refreshes the
+shared metadata key registry.
+
+"""
+
+from django.core.management.base import NoArgsCommand
+
+from metadata.models import MetadataKey
+
+
+class Command(NoArgsCommand):
+    """Reloads the metadata key registry from the database.
+
+    Running processes pick up the reloaded registry the next time
+    their own copy goes stale (see METADATA_KEY_REGISTRY_TIMEOUT).
+
+    """
+    help = 'Reloads the metadata key name-to-ID registry.'
+
+    def handle_noargs(self, **options):
+        registry = MetadataKey.reload_registry()
+        for name, key_id in sorted(registry.ids.items()):
+            self.stdout.write('{0}: {1}\n'.format(key_id, name))
@@ -3,7 +3,6 @@ accessed in a common manner is described.
 
 """
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from metadata.models.key import MetadataKey
 
@@ -32,6 +31,34 @@ class MetadataSubjectMixin(object):
         """
         return None
 
+    ## METADATA CACHE ##
+
+    def cache_metadatum(self, key, value, date=None, inherit=True):
+        """Remembers the value of the given metadata key at the given
+        date (or, if the date is None, the current value), so that
+        later requests for it need not query the database.
+
+        This is used by metadata.utils.prefetch to fill in values for
+        many subjects at once.  Values looked up with and without
+        inheritance are kept apart, and each is only used for the
+        same kind of lookup.
+
+        """
+        if '_metadata_cache' not in self.__dict__:
+            self._metadata_cache = {}
+        self._metadata_cache[(key, date, inherit)] = value
+
+    def cached_metadatum(self, key, date=None, inherit=True):
+        """Returns a (found, value) pair for the given metadata key at
+        the given date (or, if the date is None, the current value),
+        looked up with or without inheritance, where 'found' is False
+        if the value has not been cached.
+
+        """
+        cache = self.__dict__.get('_metadata_cache', {})
+        index = (key, date, inherit)
+        return (index in cache), cache.get(index)
+
     ## COMMON METADATA KEYS ##
 
     def title(self):
@@ -69,23 +96,20 @@ class MetadataSubjectMixin(object):
         date.
 
         If no such item exists, and inherit is True, the metadatum
-        request will propagate up to the parent if it exists.
+        request will propagate up to the parent if it exists, as at
+        the same date.  The whole chain is resolved in one query.
 
         """
-        key_id = MetadataKey.objects.get(name=key).id
-        try:
-            result = self.metadata_set().filter(
-                metadata_key__pk=key_id,
-                approver__isnull=False,
-                effective_from__lte=date).order_by(
-                    '-effective_from').latest().metadata_value
-        except ObjectDoesNotExist:
-            if inherit is True and self.metadata_parent() is not None:
-                result = self.metadata_parent().current_metadatum(
-                    key,
-                    inherit)
-            else:
-                result = None
+        found, result = self.cached_metadatum(key, date, inherit)
+        if not found:
+            # Imported here, as metadata.utils needs the metadata
+            # models, which need this mixin.
+            from metadata.utils import inheritance
+            result = inheritance.metadatum_at_date(
+                self,
+                MetadataKey.id_of(key),
+                date,
+                inherit)
         return result
 
     def current_metadatum(self, key, inherit=True):
@@ -97,5 +121,19 @@ class MetadataSubjectMixin(object):
         If no such item exists, and inherit is True, the metadatum
         request will propagate up to the parent if it exists.
 
+        If the value has been prefetched (see metadata.utils.prefetch),
+        no query is made.  Otherwise, inherited values are read from
+        the subject's metadata snapshot (see metadata.utils.snapshot).
+
         """
-        return self.metadatum_at_date(timezone.now(), key, inherit)
+        found, value = self.cached_metadatum(key, inherit=inherit)
+        if not found and inherit:
+            from metadata.utils import snapshot
+            values = snapshot.current(self)
+            for name, snapshot_value in values.items():
+                self.cache_metadatum(name, snapshot_value)
+            value = values.get(key)
+            self.cache_metadatum(key, value)
+        elif not found:
+            value = self.metadatum_at_date(timezone.now(), key, inherit)
+        return value
@@ -2,10 +2,74 @@
 key-value storage system.
 
 """
+import time
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from urysite import model_extensions as exts
 
 
+# The longest time, in seconds, that a process keeps its metadata key
+# registry before reloading it.  Changes made in this process
+# invalidate the registry straight away; this picks up changes made
+# in others.
+METADATA_KEY_REGISTRY_TIMEOUT = getattr(
+    settings,
+    'METADATA_KEY_REGISTRY_TIMEOUT',
+    60 * 60)
+
+# The cache key under which a registry shared between processes is
+# kept, so that reloading processes need not all query the database.
+METADATA_KEY_REGISTRY_CACHE_KEY = 'metadata_key_registry'
+
+
+class MetadataKeyRegistry(object):
+    """An in-memory map from metadata key names to their IDs.
+
+    """
+    def __init__(self, pairs):
+        """Creates a registry from an iterable of (name, ID) pairs."""
+        self.ids = dict(pairs)
+        self.names = dict((key_id, name)
+                          for name, key_id in self.ids.items())
+        self.loaded_at = time.time()
+
+    def id_of(self, name):
+        """Returns the ID of the metadata key with the given name, or
+        None if there is no such key.
+
+        """
+        return self.ids.get(name)
+
+    def name_of(self, key_id):
+        """Returns the name of the metadata key with the given ID, or
+        None if there is no such key.
+
+        """
+        return self.names.get(key_id)
+
+    def ids_of(self, names):
+        """Returns a dict mapping each of the given names that is a
+        metadata key name to that key's ID.
+
+        """
+        return dict((name, self.ids[name]) for name in names
+                    if name in self.ids)
+
+    def is_stale(self):
+        """Returns True if this registry is too old to be trusted."""
+        return (time.time() - self.loaded_at
+                > METADATA_KEY_REGISTRY_TIMEOUT)
+
+
+# The process-wide metadata key registry, or None if it needs
+# (re)loading.
+_registry = None
+
+
 class MetadataKey(models.Model):
     """A metadata key, which defines the semantics of a piece of
     metadata.
@@ -39,3 +103,65 @@ class MetadataKey(models.Model):
         (meaning) of this key, and where it is applicable.
 
         """)
+
+    @classmethod
+    def registry(cls):
+        """Returns the process-wide MetadataKeyRegistry, loading it
+        if it is missing or stale.
+
+        The registry is taken from the shared copy in the cache if
+        that is fresh, and otherwise from the database.
+
+        """
+        global _registry
+        if _registry is None or _registry.is_stale():
+            shared = cache.get(METADATA_KEY_REGISTRY_CACHE_KEY)
+            if shared is None or shared.is_stale():
+                shared = cls.reload_registry()
+            _registry = shared
+        return _registry
+
+    @classmethod
+    def reload_registry(cls):
+        """Loads the metadata key registry from the database, making
+        it both this process's registry and the shared copy, and
+        returns it.
+
+        """
+        global _registry
+        _registry = MetadataKeyRegistry(
+            cls.objects.values_list('name', 'id'))
+        cache.set(
+            METADATA_KEY_REGISTRY_CACHE_KEY,
+            _registry,
+            METADATA_KEY_REGISTRY_TIMEOUT)
+        return _registry
+
+    @classmethod
+    def id_of(cls, name):
+        """Returns the ID of the metadata key with the given name.
+
+        If the name is not in the registry, it is reloaded in case
+        the key is new; if the name is still missing,
+        MetadataKey.DoesNotExist is raised.
+
+        """
+        key_id = cls.registry().id_of(name)
+        if key_id is None:
+            key_id = cls.reload_registry().id_of(name)
+            if key_id is None:
+                raise cls.DoesNotExist(
+                    'No metadata key named {0}.'.format(name))
+        return key_id
+
+
+@receiver(post_save, sender=MetadataKey)
+@receiver(post_delete, sender=MetadataKey)
+def invalidate_registry(sender, **kwargs):
+    """Discards this process's metadata key registry, and the shared
+    copy, whenever a metadata key changes.
+
+    """
+    global _registry
+    _registry = None
+    cache.delete(METADATA_KEY_REGISTRY_CACHE_KEY)
@@ -0,0 +1,89 @@
+"""Date-aware resolution of metadata along a subject's inheritance
+chain (for example timeslot, then season, then show) in one query.
+
+"""
+
+from django.db import connection
+
+from metadata.utils.prefetch import subject_field
+
+
+def chain(subject):
+    """Returns the list of subjects whose metadata the given subject
+    can inherit, starting with the subject itself and ending with its
+    most distant ancestor.
+
+    Subjects that are not in the database (such as filler timeslots),
+    and so cannot have metadata, are left out.
+
+    """
+    result = []
+    node = subject
+    while node is not None:
+        if node.pk is not None and node.metadata_set() is not None:
+            result.append(node)
+        node = node.metadata_parent()
+    return result
+
+
+def chain_query(nodes, key_id, date):
+    """Builds the SQL, and its parameters, for retrieving the value of
+    the given metadata key in effect at the given date for the first
+    of the given subjects that has one.
+
+    The query is a UNION of one SELECT per subject, each on that
+    subject's metadata table, ordered by inheritance depth and then
+    most recent first.
+
+    """
+    quote = connection.ops.quote_name
+    selects = []
+    params = []
+    for depth, node in enumerate(nodes):
+        model = node.metadata_set().model
+        column = lambda name: quote(model._meta.get_field(name).column)
+        selects.append(
+            'SELECT {0} AS depth,'
+            ' {1} AS metadata_value,'
+            ' {2} AS effective_from'
+            ' FROM {3}'
+            ' WHERE {4} = %s AND {5} = %s'
+            ' AND {6} IS NOT NULL AND {2} <= %s'.format(
+                depth,
+                column('metadata_value'),
+                column('effective_from'),
+                quote(model._meta.db_table),
+                column(subject_field(model, type(node))),
+                column('metadata_key'),
+                column('approver')))
+        params.extend([node.pk, key_id, date])
+    sql = ('SELECT metadata_value FROM ({0}) AS inherited'
+           ' ORDER BY depth, effective_from DESC LIMIT 1'.format(
+               ' UNION ALL '.join(selects)))
+    return sql, params
+
+
+def metadatum_at_date(subject, key_id, date, inherit=True):
+    """Returns the value of the metadata key with the given ID that
+    was in effect for the given subject at the given date, or None if
+    there is no such value.
+
+    Keyword arguments:
+    subject -- the MetadataSubjectMixin instance to look up
+    key_id -- the ID of the metadata key
+    date -- the date at which to resolve the metadatum
+    inherit -- if True, the value may come from the subject's
+        metadata parent, grandparent and so on, as at the same date
+        (default: True)
+    """
+    nodes = chain(subject) if inherit else [subject]
+    nodes = [node for node in nodes if node.pk is not None]
+    result = None
+    if nodes:
+        sql, params = chain_query(nodes, key_id, date)
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        if row is not None:
+            result = row[0]
+    return result
@@ -0,0 +1,118 @@
+"""Bulk retrieval of metadata for many metadata subjects at once.
+
+Looking up a metadatum on a single subject costs a few queries, and
+more again if it has to be inherited from the subject's parent.  A
+page listing many subjects (such as a schedule) would rather fetch
+everything it needs up front; 'prefetch' does this in a few queries
+per level of inheritance, and caches the results on the subjects so
+that later calls to 'title', 'description' and so on need no queries
+at all.
+
+"""
+
+from django.utils import timezone
+
+from metadata.models import MetadataKey
+from urysite import model_extensions as exts
+
+
+def subject_field(metadata_model, subject_model):
+    """Returns the name of the field on the given metadata model that
+    links it to the given subject model.
+
+    """
+    field = exts.link_field(metadata_model, subject_model)
+    if field is None:
+        raise ValueError('{0} has no link to {1}.'.format(
+            metadata_model.__name__,
+            subject_model.__name__))
+    return field.name
+
+
+def fetch(subjects, key_ids, date):
+    """Retrieves the metadata, not inherited, of the given subjects
+    for the given key IDs, as in effect at the given date.
+
+    Subjects that are not in the database are skipped.
+
+    Returns a dict mapping (subject class, subject primary key, key
+    ID) to the metadatum value.
+
+    """
+    by_model = {}
+    for subject in subjects:
+        if subject.pk is not None:
+            by_model.setdefault(
+                subject.metadata_set().model,
+                {})[subject.pk] = type(subject)
+
+    values = {}
+    for metadata_model, subject_types in by_model.items():
+        field = subject_field(
+            metadata_model,
+            subject_types.itervalues().next())
+        column = '{0}_id'.format(field)
+        # Most recent first, so the first row seen for each subject
+        # and key is the one in effect.
+        rows = (metadata_model.objects
+                .filter(**{'{0}__in'.format(field): subject_types.keys()})
+                .filter(metadata_key__in=key_ids,
+                        approver__isnull=False,
+                        effective_from__lte=date)
+                .order_by('-effective_from')
+                .values_list(column, 'metadata_key', 'metadata_value'))
+        for subject_pk, key_id, value in rows:
+            index = (subject_types[subject_pk], subject_pk, key_id)
+            if index not in values:
+                values[index] = value
+    return values
+
+
+def prefetch(subjects, keys, date=None, inherit=True):
+    """Resolves the given metadata keys for all of the given subjects,
+    caching the values on the subjects.
+
+    Values are resolved exactly as 'metadatum_at_date' would, and
+    inheritance is followed one level at a time for all subjects at
+    once, so the number of queries depends on the depth of
+    inheritance and the number of metadata models involved, not the
+    number of subjects.
+
+    Keyword arguments:
+    subjects -- an iterable of MetadataSubjectMixin instances
+    keys -- an iterable of metadata key names
+    date -- the date at which to resolve the metadata; if None, the
+        current values are resolved and used by 'current_metadatum'
+        (default: None)
+    inherit -- if True, values missing on a subject are taken from
+        its metadata parent, and so on up (default: True)
+    """
+    at = timezone.now() if date is None else date
+    keys = list(keys)
+    key_ids = MetadataKey.registry().ids_of(keys)
+
+    # Each entry is (subject, the subject or ancestor being looked
+    # at, the keys still unresolved for the subject).
+    pending = [(subject, subject, set(keys)) for subject in subjects]
+    while pending:
+        values = fetch(
+            [node for subject, node, missing in pending],
+            key_ids.values(),
+            at)
+
+        next_pending = []
+        for subject, node, missing in pending:
+            for key in list(missing):
+                index = (type(node), node.pk, key_ids.get(key))
+                if index in values:
+                    subject.cache_metadatum(
+                        key, values[index], date, inherit)
+                    missing.discard(key)
+
+            parent = node.metadata_parent() if inherit else None
+            if missing and parent is not None:
+                next_pending.append((subject, parent, missing))
+            else:
+                for key in missing:
+                    subject.cache_metadatum(key, None, date, inherit)
+        pending = next_pending
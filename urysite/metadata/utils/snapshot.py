@@ -0,0 +1,189 @@
+"""Materialised snapshots of the current metadata of each subject.
+
+Subjects such as shows are read far more often than their metadata
+changes, so the whole current key-value map of a subject, with
+inheritance applied, is worked out once and kept in the cache.  A
+snapshot is thrown away when metadata on the subject or one of its
+ancestors is saved or deleted, and expires by itself when a
+future-dated metadatum on the chain becomes effective.
+
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from metadata.models import MetadataKey
+from metadata.utils.inheritance import chain
+from urysite import cache_versions
+
+
+# The longest time, in seconds, that a snapshot is kept in the cache.
+METADATA_SNAPSHOT_TIMEOUT = getattr(
+    settings,
+    'METADATA_SNAPSHOT_TIMEOUT',
+    60 * 60 * 24)
+
+
+def subject_name(subject):
+    """Returns a string identifying the given subject, for use in
+    cache keys.
+
+    """
+    return '{0}.{1}:{2}'.format(
+        subject._meta.app_label,
+        subject._meta.object_name.lower(),
+        subject.pk)
+
+
+def snapshot_key(subject):
+    """Returns the cache key of the given subject's snapshot."""
+    return 'metadata_snapshot:{0}'.format(subject_name(subject))
+
+
+def version_key(subject):
+    """Returns the cache key of the given subject's metadata version,
+    which changes whenever the subject's own metadata does.
+
+    """
+    return 'metadata_version:{0}'.format(subject_name(subject))
+
+
+class Snapshot(object):
+    """The current metadata of a subject, as at the moment it was
+    taken.
+
+    """
+    def __init__(self, values, versions, expires):
+        """Creates a snapshot.
+
+        Keyword arguments:
+        values -- a dict mapping metadata key names to current values
+        versions -- the list of metadata versions of the subject's
+            inheritance chain when the snapshot was taken
+        expires -- the moment at which a future-dated metadatum on
+            the chain becomes effective, or None if there is none
+        """
+        self.values = values
+        self.versions = versions
+        self.expires = expires
+
+    def is_valid(self, versions, date=None):
+        """Returns True if this snapshot still holds given the
+        current versions of the chain, at the given moment in time
+        (default: now).
+
+        """
+        if date is None:
+            date = timezone.now()
+        return (versions == self.versions
+                and (self.expires is None or date < self.expires))
+
+
+def take(nodes, versions, date):
+    """Takes a snapshot of the metadata of the first of the given
+    inheritance chain nodes, as at the given date.
+
+    This makes one query per node.
+
+    """
+    registry = MetadataKey.registry()
+    values = {}
+    expires = None
+    for node in nodes:
+        own = {}
+        # Metadata without an effective_from is inert.
+        rows = (node.metadata_set()
+                .filter(approver__isnull=False,
+                        effective_from__isnull=False)
+                .order_by('-effective_from')
+                .values_list('metadata_key', 'metadata_value',
+                             'effective_from'))
+        for key_id, value, effective_from in rows:
+            if effective_from > date:
+                if expires is None or effective_from < expires:
+                    expires = effective_from
+            elif key_id not in own:
+                own[key_id] = value
+        # Nearer nodes take precedence over their ancestors.
+        for key_id, value in own.items():
+            values.setdefault(registry.name_of(key_id), value)
+    return Snapshot(values, versions, expires)
+
+
+def current(subject):
+    """Returns a dict mapping metadata key names to the current
+    values of the given subject's metadata, with inheritance.
+
+    The snapshot and the versions of the subject's chain are
+    retrieved from the cache in one request; the snapshot is only
+    taken again if it is missing, out of date or expired.
+
+    """
+    date = timezone.now()
+    nodes = chain(subject)
+    if not nodes:
+        return {}
+    if nodes[0] is not subject:
+        # Subjects not in the database (such as filler timeslots) have
+        # no metadata of their own, so theirs is exactly that of
+        # their nearest ancestor that is.
+        return current(nodes[0])
+
+    version_keys = [version_key(node) for node in nodes]
+    cached = cache.get_many([snapshot_key(subject)] + version_keys)
+    versions = [cached.get(key) for key in version_keys]
+
+    snapshot = cached.get(snapshot_key(subject))
+    if snapshot is None or not snapshot.is_valid(versions, date):
+        snapshot = take(nodes, versions, date)
+        timeout = METADATA_SNAPSHOT_TIMEOUT
+        if snapshot.expires is not None:
+            left = snapshot.expires - date
+            timeout = min(
+                timeout,
+                left.days * 24 * 60 * 60 + left.seconds + 1)
+        cache.set(snapshot_key(subject), snapshot, timeout)
+    return snapshot.values
+
+
+def bump(subject):
+    """Changes the metadata version of the given subject, making the
+    snapshots of it and of everything inheriting from it stale.
+
+    """
+    cache_versions.bump(version_key(subject))
+
+
+def invalidate_snapshots(sender, instance, **kwargs):
+    """Makes snapshots stale whenever a metadatum is saved (created,
+    approved or re-dated) or deleted.
+
+    """
+    try:
+        subject = instance.attached_element()
+    except ObjectDoesNotExist:
+        # The subject has been deleted along with its metadata.
+        subject = None
+    if subject is not None:
+        bump(subject)
+
+
+def watch(*models):
+    """Makes saving or deleting an instance of any of the given
+    metadata models make the snapshots of its subject stale.
+
+    """
+    for model in models:
+        post_save.connect(
+            invalidate_snapshots,
+            sender=model,
+            dispatch_uid='metadata_snapshot_save_{0}'.format(
+                model.__name__))
+        post_delete.connect(
+            invalidate_snapshots,
+            sender=model,
+            dispatch_uid='metadata_snapshot_delete_{0}'.format(
+                model.__name__))
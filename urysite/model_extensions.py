@@ -54,3 +54,16 @@ def foreign_key(source_meta,
         dest,
         db_column=db_column,
         help_text='The %s this %s concerns.' % format_tuple)
+
+
+def link_field(model, target):
+    """Returns the foreign key field on the given model that links it
+    to the given target model (or a model it inherits from), or None
+    if there is no such field.
+
+    """
+    for field in model._meta.fields:
+        if (isinstance(field, models.ForeignKey)
+                and issubclass(target, field.rel.to)):
+            return field
+    return None
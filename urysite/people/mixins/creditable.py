@@ -3,6 +3,27 @@
 """
 
 
+def join_by_line(credits):
+    """Joins the names of the people credited in the given credits
+    into a by-line, such as 'A, B and C'.
+
+    If there are no credits, the empty string is returned.
+
+    """
+    credits = list(credits)
+    length = len(credits)
+    if length == 0:
+        by_line = ''
+    elif length == 1:
+        by_line = credits[0].person.full_name()
+    else:
+        by_line = u' and '.join((
+            u', '.join(
+                cred.person.full_name() for cred in credits[:-1]),
+            credits[-1].person.full_name()))
+    return by_line
+
+
 class CreditableMixin(object):
     """Mixin granting the ability to access credits."""
 
@@ -32,20 +53,25 @@ class CreditableMixin(object):
         item dependent but should be the time-span of the item itself
         where applicable and an infinite range otherwise.
 
+        The people and credit types of the credits are retrieved in
+        the same query.
+
         """
         from_date, to_date = self.ensure_range(from_date, to_date)
 
-        credits = (self.credits_set().exclude(approver__isnull=True)
-                   if exclude_unapproved
-                   else self.credits_set().all())
+        credits = self.credits_set().select_related(
+            'person',
+            'credit_type')
+        if exclude_unapproved:
+            credits = credits.exclude(approver__isnull=True)
 
         # Why excludes?  Because effective_to might be NULL
         # and we don't want to throw away results where it is
         # as this entails indefinite effectiveness.
         if from_date:
-            credits.exclude(effective_from__gt=from_date)
+            credits = credits.exclude(effective_from__gt=from_date)
         if to_date:
-            credits.exclude(effective_to__lt=to_date)
+            credits = credits.exclude(effective_to__lt=to_date)
         return credits
 
     ## ADDITIONAL METHODS ##
@@ -62,20 +88,45 @@ class CreditableMixin(object):
         If nobody significant worked on the item, the empty string is
         returned.
 
+        Only credits whose type is marked as appearing in by-lines are
+        included.
+
+        If the by-line has been worked out in bulk (see
+        people.utils.by_lines), no query is made.
+
         """
-        credits = list(self.credits(*args, **kwargs))
-        length = len(credits)
-        if length == 0:
-            by_line = ''
-        elif length == 1:
-            by_line = credits[0].person.full_name()
+        cache_key = self.by_line_key(*args, **kwargs)
+        cache = self.__dict__.get('_by_line_cache', {})
+        if cache_key in cache:
+            by_line = cache[cache_key]
         else:
-            by_line = u' and '.join((
-                u', '.join(
-                    cred.person.full_name() for cred in credits[:-1]),
-                credits[-1].person.full_name()))
+            by_line = join_by_line(self.credits(*args, **kwargs).filter(
+                credit_type__is_in_byline=True))
         return by_line
 
+    def cache_by_line(self, by_line, *args, **kwargs):
+        """Remembers the by-line for the given credits() arguments, so
+        that later requests for it need not query the database.
+
+        This is used by people.utils.by_lines to fill in by-lines for
+        many items at once.
+
+        """
+        if '_by_line_cache' not in self.__dict__:
+            self._by_line_cache = {}
+        self._by_line_cache[self.by_line_key(*args, **kwargs)] = by_line
+
+    def by_line_key(self,
+                    from_date=None,
+                    to_date=None,
+                    exclude_unapproved=True):
+        """Returns a key identifying the by-line asked for by the
+        given credits() arguments.
+
+        """
+        return self.ensure_range(from_date, to_date) + (
+            exclude_unapproved,)
+
     ## INTERNAL SUPPORT METHODS ##
 
     def ensure_range(self, from_date, to_date):
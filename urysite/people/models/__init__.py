@@ -4,3 +4,9 @@ from people.models.person import Person, Creator, Approver
 from people.models.role import Role, RoleVisibility
 from people.models.role import GroupRootRole, GroupType
 from people.models.credit import Credit, CreditType
+
+# Changes to role metadata invalidate metadata snapshots; this must go
+# last.
+from metadata.utils import snapshot
+from people.models.role import RoleMetadata
+snapshot.watch(RoleMetadata)
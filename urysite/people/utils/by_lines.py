@@ -0,0 +1,97 @@
+"""Bulk computation of by-lines for many creditable items at once.
+
+Timeslots and seasons take their credits from their show, so a page
+listing many timeslots would otherwise fetch the same show's credits
+once per timeslot.  'by_lines' instead fetches the credits of every owner
+(the item that actually holds the credits) in one query per credit
+model, and works out each item's by-line from those in memory.
+
+"""
+
+from people.mixins.creditable import join_by_line
+from urysite import model_extensions as exts
+
+
+def owner_field(credit_model, owner):
+    """Returns the name of the field on the given credit model that
+    links it to the given credit owner.
+
+    """
+    field = exts.link_field(credit_model, type(owner))
+    if field is None:
+        raise ValueError('{0} has no link to {1}.'.format(
+            credit_model.__name__,
+            type(owner).__name__))
+    return field.name
+
+
+def in_range(credit, from_date, to_date, exclude_unapproved):
+    """Decides in memory whether a credit would be returned by
+    CreditableMixin.credits with the given (already ensured) range.
+
+    """
+    return not (
+        (exclude_unapproved and credit.approver_id is None)
+        or (from_date and credit.effective_from > from_date)
+        or (to_date
+            and credit.effective_to is not None
+            and credit.effective_to < to_date))
+
+
+def by_lines(items, *args, **kwargs):
+    """Works out the by-lines of all of the given creditable items.
+
+    Arguments beyond 'items' are passed to each item's 'credits' as
+    in CreditableMixin.by_line, so see that function.
+
+    Returns a list of the by-lines of each of the given items, in
+    order.  The by-lines are also cached on the items, so later calls
+    to their 'by_line' with the same arguments make no queries.
+
+    """
+    items = list(items)
+
+    # Group the items by credit model, then by credit owner.
+    owners = {}
+    for item in items:
+        credits_set = item.credits_set()
+        owner = credits_set.instance
+        if owner.pk is not None:
+            owners.setdefault(
+                credits_set.model,
+                {}).setdefault(owner.pk, owner)
+
+    credits = {}
+    for credit_model, model_owners in owners.items():
+        field = owner_field(
+            credit_model,
+            model_owners.itervalues().next())
+        rows = (credit_model.objects
+                .select_related('person', 'credit_type')
+                .filter(**{'{0}__in'.format(field): model_owners.keys()})
+                .filter(credit_type__is_in_byline=True))
+        for credit in rows:
+            credits.setdefault(
+                (credit_model, getattr(credit, '{0}_id'.format(field))),
+                []).append(credit)
+
+    # Each item's credits are filtered by its own range, but the
+    # by-line is memoised by owner and the credits that are left, as
+    # consecutive timeslots of the same show have different ranges
+    # but usually the same credits.
+    memo = {}
+    result = []
+    for item in items:
+        credits_set = item.credits_set()
+        owner_key = (credits_set.model, credits_set.instance.pk)
+        range_key = item.by_line_key(*args, **kwargs)
+        in_effect = tuple(
+            credit for credit in credits.get(owner_key, [])
+            if in_range(credit, *range_key))
+        memo_key = (owner_key, tuple(credit.pk for credit in in_effect))
+        if memo_key not in memo:
+            memo[memo_key] = join_by_line(in_effect)
+        by_line = memo[memo_key]
+        item.cache_by_line(by_line, *args, **kwargs)
+        result.append(by_line)
+    return result
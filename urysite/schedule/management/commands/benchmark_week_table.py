@@ -0,0 +1,76 @@
+"""The 'benchmark_week_table' management command, which times the
+tabulation of worst-case week schedules.
+
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import NoArgsCommand
+
+from schedule.models import Timeslot
+from schedule.views.week_table import WeekTable
+
+
+class Command(NoArgsCommand):
+    """Times the tabulation of a week made entirely of 15-minute
+    shows, which is the worst realistic case for the number of rows
+    in a week table, and of a week mixing 2-hour shows with 15-minute
+    ones, in which most entries span several rows.
+
+    """
+    help = 'Times the tabulation of dense week schedules.'
+
+    # How many times each week is tabulated.
+    REPETITIONS = 20
+
+    def slot(self, start, minutes):
+        """Creates an unsaved slot, as tabulation only needs
+        durations.
+
+        """
+        return Timeslot(start_time=start, duration=timedelta(minutes=minutes))
+
+    def dense_week(self, start):
+        """Creates a week of back-to-back 15-minute slots."""
+        return [[self.slot(start, 15) for i in xrange(24 * 4)]
+                for day in xrange(7)]
+
+    def mixed_week(self, start):
+        """Creates a week in which each day alternates 2-hour slots
+        with runs of eight 15-minute slots, with the long slots of
+        odd days beside the short slots of even days.
+
+        """
+        week = []
+        for day in xrange(7):
+            slots = []
+            for cycle in xrange(6):
+                long_slot = [self.slot(start, 120)]
+                short_slots = [self.slot(start, 15) for i in xrange(8)]
+                slots.extend(long_slot + short_slots
+                             if day % 2 == 0
+                             else short_slots + long_slot)
+            week.append(slots)
+        return week
+
+    def time(self, name, make_week, start):
+        """Times the tabulation of weeks made with the given function
+        and writes out the result.
+
+        """
+        weeks = [make_week(start) for repetition in xrange(self.REPETITIONS)]
+
+        started = time.time()
+        for week in weeks:
+            WeekTable.tabulate_week_lists(week, start)
+        per_week = (time.time() - started) / self.REPETITIONS
+        self.stdout.write(
+            '{0} week tabulation: {1:.2f}ms per week\n'.format(
+                name,
+                per_week * 1000))
+
+    def handle_noargs(self, **options):
+        start = datetime(2012, 10, 1, 7)
+        self.time('Dense', self.dense_week, start)
+        self.time('Mixed', self.mixed_week, start)
@@ -13,3 +13,24 @@ from schedule.models.timeslot import Timeslot, TimeslotMetadata
 from schedule.models.block_direct_rule import BlockShowRule
 
 from schedule.models.credit import ShowCredit
+
+# Any change to the above models can change how the schedule looks,
+# so they all invalidate schedule caches; this must go last.
+from metadata.utils import snapshot
+from schedule.utils import revision
+revision.watch(
+    Term,
+    Block,
+    BlockRangeRule,
+    BlockShowRule,
+    Show,
+    ShowMetadata,
+    ShowCredit,
+    Season,
+    SeasonMetadata,
+    Timeslot,
+    TimeslotMetadata)
+snapshot.watch(
+    ShowMetadata,
+    SeasonMetadata,
+    TimeslotMetadata)
@@ -26,6 +26,8 @@ class Season(MetadataSubjectMixin,
         db_table = 'show_season'  # In schema 'schedule'
         verbose_name = 'show season'
         app_label = 'schedule'
+        # Season numbers (see 'number') follow this ordering.
+        ordering = ('id',)
 
     id = exts.primary_key_from_meta(Meta)
 
@@ -39,6 +41,9 @@ class Season(MetadataSubjectMixin,
         db_column='termid',
         help_text='The term this season is scheduled for.')
 
+    # The cached result of 'number'.
+    _number = None
+
     ## MAGIC METHODS ##
 
     def __unicode__(self):
@@ -63,7 +68,7 @@ class Season(MetadataSubjectMixin,
 
         """
         return ('season_detail', (), {
-            'pk': self.show.id,
+            'pk': self.show_id,
             'season_num': self.number()})
 
     ## ADDITIONAL METHODS ##
@@ -72,14 +77,16 @@ class Season(MetadataSubjectMixin,
         """Returns the relative number of this season, with the first
         season of the attached show returning a number of 1.
 
+        This costs one counting query, unless the number has already
+        been worked out (for example by schedule.utils.numbering for
+        a whole list of seasons at once).
+
         """
-        number = None
-        for index, season in enumerate(self.show.season_set.all()):
-            if season.id == self.id:
-                number = index + 1  # Note that this can never be 0
-                break
-        assert number, "Season not in its show's season set."
-        return number
+        if self._number is None:
+            # Note that this can never be 0
+            self._number = self.show.season_set.filter(
+                id__lt=self.id).count() + 1
+        return self._number
 
     def block(self):
         """Returns the block that the season is in, if any.
@@ -93,19 +100,10 @@ class Season(MetadataSubjectMixin,
 
         """
         # Show rules take precedence
-        show_block = self.show.block()
-        if show_block is None:
-            # TODO: add direct rules for season
-            # Now do season based checks
-            #block_show_matches = self.blockshowrule_set.filter(
-            #    show=self).order_by('-priority')
-            #if block_show_matches.exists():
-            #block = block_show_matches[0]
-            #else:
-            block = None
-        else:
-            block = show_block
-        return block
+        # TODO: add direct rules for season
+        # Imported here as the block resolver depends on this model.
+        from schedule.utils import blocks
+        return blocks.rules().show_block(self.show_id)
 
     @staticmethod
     def make_foreign_key(src_meta, db_column='show_season_id'):
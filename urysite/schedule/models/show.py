@@ -99,14 +99,9 @@ class Show(MetadataSubjectMixin,
         so as to pull in season and timeslot specific matching rules.
 
         """
-        # Show rules take precedence
-        block_matches = self.blockshowrule_set.order_by(
-            '-block__priority')
-        if block_matches.exists():
-            block = block_matches[0].block
-        else:
-            block = None
-        return block
+        # Imported here as the block resolver depends on this model.
+        from schedule.utils import blocks
+        return blocks.rules().show_block(self.id)
 
 
 class ShowMetadata(Metadata):
@@ -3,10 +3,92 @@
 # IF YOU'RE ADDING CLASSES TO THIS, DON'T FORGET TO ADD THEM TO
 # __init__.py
 
+import time
+from bisect import bisect_right
+
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from schedule.utils import revision
 from urysite import model_extensions as exts
 
 
+# The longest time, in seconds, that a process keeps its term calendar
+# before reloading it.  Term changes bump the schedule revision, which
+# makes every process reload its calendar; this is a backstop.
+TERM_CALENDAR_TIMEOUT = getattr(
+    settings,
+    'TERM_CALENDAR_TIMEOUT',
+    60 * 60)
+
+
+class TermCalendar(object):
+    """An in-memory, sorted list of terms that can answer term
+    lookups without touching the database.
+
+    """
+    def __init__(self, terms, schedule_revision=None):
+        """Creates a calendar from an iterable of terms.
+
+        Keyword arguments:
+        terms -- an iterable of Terms
+        schedule_revision -- the schedule revision the terms were
+            loaded at, or None if the calendar does not follow the
+            schedule revision (default: None)
+        """
+        self.schedule_revision = schedule_revision
+        self.terms = sorted(terms, key=lambda term: term.start_date)
+        self.starts = [term.start_date for term in self.terms]
+        self.loaded_at = time.time()
+
+    def started_by(self, date):
+        """Returns, latest first, the terms that start at or before
+        the given date.
+
+        """
+        return reversed(self.terms[:bisect_right(self.starts, date)])
+
+    def of(self, date):
+        """Returns the term of the given date, or None if the date
+        does not lie in any known term.
+
+        See Term.of.
+
+        """
+        for term in self.started_by(date):
+            if date < term.end_date:
+                return term
+        return None
+
+    def before(self, date):
+        """Returns the last term to occur before the given date, or
+        None if there is no such term.
+
+        See Term.before.
+
+        """
+        for term in self.started_by(date):
+            if term.end_date <= date:
+                return term
+        return None
+
+    def is_stale(self):
+        """Returns True if this calendar is too old to be trusted,
+        either because the schedule revision has changed since it was
+        loaded or because it has been kept too long.
+
+        """
+        return (
+            (self.schedule_revision is not None and
+             self.schedule_revision != revision.current()) or
+            time.time() - self.loaded_at > TERM_CALENDAR_TIMEOUT)
+
+
+# The process-wide term calendar, or None if it needs (re)loading.
+_calendar = None
+
+
 class Term(models.Model):
     """An entry in the URY university terms set."""
 
@@ -45,16 +127,27 @@ class Term(models.Model):
         max_length=10,
         db_column='descr')
 
+    @classmethod
+    def calendar(cls):
+        """Returns the process-wide TermCalendar, loading it from the
+        database if it is missing or stale.
+
+        """
+        global _calendar
+        if _calendar is None or _calendar.is_stale():
+            # The revision is read first, so that a change made while
+            # loading makes the calendar stale straight away.
+            current = revision.current()
+            _calendar = TermCalendar(cls.objects.all(), current)
+        return _calendar
+
     @classmethod
     def of(cls, date):
         """Returns the term of the given date, or None if the date
         does not lie in any known term.
 
         """
-        query = cls.objects.filter(
-            start_date__lte=date,
-            end_date__gt=date)
-        return query.latest() if query.exists() else None
+        return cls.calendar().of(date)
 
     @classmethod
     def before(cls, date):
@@ -65,7 +158,16 @@ class Term(models.Model):
         if any.
 
         """
-        query = cls.objects.filter(
-            start_date__lte=date,
-            end_date__lte=date)
-        return query.latest() if query.exists() else None
+        return cls.calendar().before(date)
+
+
+@receiver(post_save, sender=Term)
+@receiver(post_delete, sender=Term)
+def invalidate_calendar(sender, **kwargs):
+    """Discards this process's term calendar whenever a term changes.
+
+    Other processes notice the change through the schedule revision.
+
+    """
+    global _calendar
+    _calendar = None
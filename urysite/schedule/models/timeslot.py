@@ -3,13 +3,15 @@
 # IF YOU'RE ADDING CLASSES TO THIS, DON'T FORGET TO ADD THEM TO
 # __init__.py
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from urysite import model_extensions as exts
-from django.utils import timezone
 from datetime import timedelta as td
-from django.db.models import Q
 import timedelta
-from schedule.models import BlockRangeRule
 from schedule.models.season import Season
 from metadata.models import Metadata
 from metadata.mixins import MetadataSubjectMixin
@@ -17,6 +19,18 @@ from metadata.mixins import DateRangeMixin
 from people.mixins import CreditableMixin
 
 
+# The cache key under which the longest timeslot duration is stored.
+LONGEST_DURATION_CACHE_KEY = 'schedule_timeslot_longest_duration'
+
+# The longest time, in seconds, that the longest timeslot duration is
+# cached.  Changes made through the models discard it straight away;
+# this picks up changes made to the database directly.
+LONGEST_DURATION_TIMEOUT = getattr(
+    settings,
+    'LONGEST_DURATION_TIMEOUT',
+    5 * 60)
+
+
 class Timeslot(models.Model,
                MetadataSubjectMixin,
                CreditableMixin,
@@ -35,6 +49,8 @@ class Timeslot(models.Model,
         verbose_name = 'show timeslot'
         get_latest_by = 'start_time'
         app_label = 'schedule'
+        # Timeslot numbers (see 'number') follow this ordering.
+        ordering = ('start_time', 'id')
 
     id = exts.primary_key_from_meta(Meta)
 
@@ -42,12 +58,16 @@ class Timeslot(models.Model,
 
     start_time = models.DateTimeField(
         db_column='start_time',
+        db_index=True,
         help_text='The date and time of the start of this timeslot.')
 
     duration = timedelta.TimedeltaField(
         db_column='duration',
         help_text='The duration of the timeslot.')
 
+    # The cached result of 'number'.
+    _number = None
+
     ## MAGIC METHODS ##
 
     def __unicode__(self):
@@ -100,7 +120,7 @@ class Timeslot(models.Model,
 
         """
         return ('timeslot_detail', (), {
-            'pk': self.season.show.id,
+            'pk': self.season.show_id,
             'season_num': self.season.number(),
             'timeslot_num': self.number()})
 
@@ -114,70 +134,55 @@ class Timeslot(models.Model,
         in this case, if a block is needed).
 
         """
-        # Season rules take precedence
-        season_block = self.season.block()
-        if season_block is None:
-            # TODO: add direct rules for timeslot
-            # Now do season based checks
-            #block_show_matches = self.blockshowrule_set.filter(
-            #    show=self).order_by('-priority')
-            #if block_show_matches.exists():
-            #block = block_show_matches[0]
-            #else:
-            # TODO: add time-range rules for timeslot
-
-            # Get start as distance from midnight, and end as
-            # distance plus duration
-            slot_start = self.start_time - self.start_time.replace(
-                hour=0,
-                minute=0,
-                second=0,
-                microsecond=0)
-            slot_end = slot_start + self.duration
-            assert slot_start < slot_end, "Slot starts after end."
-
-            # Because the block range is in local time and the slot
-            # dates are in UTC, we'll need to subtract the local
-            # time's UTC offset in the calculations.
-            utc = self.start_time.astimezone(
-                timezone.get_current_timezone()).utcoffset()
-            day = td(days=1)
-
-            # Now we can do simple inequalities to match the
-            # time-ranges, with the caveat that we'll have to check
-            # against the slot projected forwards one day to make
-            # sure that ranges starting the day before the show and
-            # ending on the day of the show are considered correctly.
-            block_range_matches = BlockRangeRule.objects.filter(
-                Q(start_time__lte=slot_start + utc,
-                  end_time__gte=slot_end + utc) |
-                Q(start_time__lte=slot_start + utc + day,
-                  end_time__gte=slot_end + utc + day)).order_by(
-                      '-block__priority')
-            if block_range_matches.exists():
-                block = block_range_matches[0].block
-            else:
-                block = None
-        else:
-            block = season_block
-        return block
+        # TODO: add direct rules for timeslot
+        # Imported here as the block resolver depends on this model.
+        from schedule.utils import blocks
+        return blocks.rules().timeslot_block(self)
 
     def end_time(self):
         """Calculates the end time of this timeslot."""
         return self.start_time + self.duration
 
+    @classmethod
+    def longest_duration(cls):
+        """Returns the duration of the longest timeslot in the
+        schedule, or a zero duration if there are no timeslots.
+
+        The result is cached until a timeslot is next saved or
+        deleted through the models, or for LONGEST_DURATION_TIMEOUT
+        seconds, whichever comes first.  It allows range queries to
+        bound the start time of any timeslot overlapping a moment,
+        which in turn lets the database use the index on 'start_time'
+        (see schedule/sql/timeslot_start_time_index.sql) instead of
+        scanning the whole table.
+
+        """
+        longest = cache.get(LONGEST_DURATION_CACHE_KEY)
+        if longest is None:
+            longest_slots = cls.objects.order_by('-duration')[:1]
+            longest = (longest_slots[0].duration
+                       if longest_slots
+                       else td(0))
+            cache.set(LONGEST_DURATION_CACHE_KEY,
+                      longest,
+                      LONGEST_DURATION_TIMEOUT)
+        return longest
+
     def number(self):
         """Returns the relative number of this timeslot, with the
         first timeslot of the attached season returning a number of 1.
 
+        This costs one counting query, unless the number has already
+        been worked out (for example by schedule.utils.numbering for
+        a whole list of timeslots at once).
+
         """
-        number = None
-        for index, timeslot in enumerate(self.season.timeslot_set.all()):
-            if timeslot.id == self.id:
-                number = index + 1  # Note that this can never be 0
-                break
-        assert number, "Timeslot not in its season's timeslot set."
-        return number
+        if self._number is None:
+            # Note that this can never be 0
+            self._number = self.season.timeslot_set.filter(
+                Q(start_time__lt=self.start_time) |
+                Q(start_time=self.start_time, id__lt=self.id)).count() + 1
+        return self._number
 
     @staticmethod
     def make_foreign_key(src_meta,
@@ -210,3 +215,14 @@ class TimeslotMetadata(Metadata):
     id = exts.primary_key_from_meta(Meta)
 
     timeslot = Timeslot.make_foreign_key(Meta)
+
+
+@receiver(post_save, sender=Timeslot)
+@receiver(post_delete, sender=Timeslot)
+def invalidate_longest_duration(sender, **kwargs):
+    """Discards the cached longest timeslot duration whenever a
+    timeslot changes, as that timeslot may now be (or no longer be)
+    the longest.
+
+    """
+    cache.delete(LONGEST_DURATION_CACHE_KEY)
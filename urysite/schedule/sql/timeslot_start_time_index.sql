@@ -0,0 +1,14 @@
+-- Index on timeslot start times, backing Timeslot.start_time's
+-- db_index (see schedule.models.timeslot).
+--
+-- Range queries bound the start time of any timeslot overlapping a
+-- moment using the longest timeslot duration, and rely on this index
+-- to avoid scanning the whole timeslot table.
+--
+-- syncdb creates this index for new databases, so this only needs
+-- running by hand against existing ones, with the schedule schema on
+-- the search path.  This file is deliberately not named after the
+-- model, so syncdb does not run it as initial SQL.
+
+CREATE INDEX show_season_timeslot_start_time
+    ON show_season_timeslot (start_time);
@@ -5,11 +5,17 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+from django.core.cache import cache
 from django.test import TestCase
-from schedule.models import Timeslot
-from schedule.utils import filler
+from schedule.models import Block, BlockRangeRule, BlockShowRule
+from schedule.models import Term, Timeslot
+from schedule.models.term import TermCalendar
+from schedule.utils import filler, numbering
+from schedule.utils.blocks import BlockRules
+from schedule.utils.range import overlaps
+from schedule.views.week_table import WeekTable
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 class FillEmptyRange(TestCase):
@@ -37,3 +43,338 @@ class FillEmptyRange(TestCase):
         self.assertTrue(isinstance(filler_slot, Timeslot))
         self.assertEqual(filler_slot.start_time, self.past_time)
         self.assertEqual(filler_slot.duration, self.duration)
+
+
+class TermCalendarLookups(TestCase):
+    """Tests whether term calendars find the same terms as the
+    database queries they replace."""
+    def setUp(self):
+        now = timezone.now()
+        self.autumn = Term(
+            id=1,
+            name='Autumn',
+            start_date=now - timedelta(weeks=20),
+            end_date=now - timedelta(weeks=10))
+        self.spring = Term(
+            id=2,
+            name='Spring',
+            start_date=now - timedelta(weeks=5),
+            end_date=now + timedelta(weeks=5))
+        self.calendar = TermCalendar([self.spring, self.autumn])
+
+    def test_in_term(self):
+        """Tests whether a date inside a term is in that term."""
+        self.assertEqual(
+            self.calendar.of(self.spring.start_date),
+            self.spring)
+
+    def test_in_holiday(self):
+        """Tests whether a date in a holiday is in no term, and comes
+        after the term before that holiday.
+
+        """
+        date = self.autumn.end_date
+        self.assertIsNone(self.calendar.of(date))
+        self.assertEqual(self.calendar.before(date), self.autumn)
+
+    def test_before_all_terms(self):
+        """Tests whether a date before every known term has no term.
+
+        """
+        date = self.autumn.start_date - timedelta(days=1)
+        self.assertIsNone(self.calendar.of(date))
+        self.assertIsNone(self.calendar.before(date))
+
+
+class RangeOverlaps(TestCase):
+    """Tests whether timeslots are divided into ranges in memory in
+    the same way as the range queries in ScheduleRange.between."""
+    def setUp(self):
+        self.start = datetime(2012, 10, 1)
+        self.end = self.start + timedelta(days=1)
+
+    def slot(self, start_hours, duration_hours):
+        """Creates an unsaved slot starting the given number of hours
+        after the start of the range.
+
+        """
+        return Timeslot(
+            start_time=self.start + timedelta(hours=start_hours),
+            duration=timedelta(hours=duration_hours))
+
+    def assertOverlaps(self, timeslot, expected, **exclusions):
+        """Asserts whether the timeslot is in the range with the given
+        exclude_* flags.
+
+        """
+        self.assertEqual(
+            overlaps(timeslot, self.start, self.end, **exclusions),
+            expected)
+
+    def test_inside(self):
+        """Tests whether slots inside the range are never excluded."""
+        timeslot = self.slot(2, 2)
+        self.assertOverlaps(timeslot, True)
+        self.assertOverlaps(timeslot, True, exclude_before_start=True)
+        self.assertOverlaps(timeslot, True, exclude_after_end=True)
+        self.assertOverlaps(timeslot, True, exclude_subsuming=True)
+
+    def test_outside(self):
+        """Tests whether slots ending at the start of the range, or
+        starting at its end, are always excluded.
+
+        """
+        self.assertOverlaps(self.slot(-2, 2), False)
+        self.assertOverlaps(self.slot(24, 2), False)
+
+    def test_before_start(self):
+        """Tests whether slots starting before the range and ending
+        inside it are only excluded by exclude_before_start.
+
+        """
+        timeslot = self.slot(-1, 2)
+        self.assertOverlaps(timeslot, True)
+        self.assertOverlaps(timeslot, False, exclude_before_start=True)
+        self.assertOverlaps(timeslot, True, exclude_after_end=True)
+        self.assertOverlaps(timeslot, True, exclude_subsuming=True)
+
+    def test_after_end(self):
+        """Tests whether slots starting inside the range and ending
+        after it are only excluded by exclude_after_end.
+
+        """
+        timeslot = self.slot(23, 2)
+        self.assertOverlaps(timeslot, True)
+        self.assertOverlaps(timeslot, True, exclude_before_start=True)
+        self.assertOverlaps(timeslot, False, exclude_after_end=True)
+        self.assertOverlaps(timeslot, True, exclude_subsuming=True)
+
+    def test_subsuming(self):
+        """Tests whether slots covering the whole range are only
+        excluded by exclude_subsuming.
+
+        """
+        timeslot = self.slot(-1, 26)
+        self.assertOverlaps(timeslot, True)
+        self.assertOverlaps(timeslot, True, exclude_before_start=True)
+        self.assertOverlaps(timeslot, True, exclude_after_end=True)
+        self.assertOverlaps(timeslot, False, exclude_subsuming=True)
+
+    def test_across_midnight(self):
+        """Tests whether a slot crossing midnight is in both days,
+        as it would be with one range query per day.
+
+        """
+        timeslot = self.slot(23, 2)
+        next_start, next_end = self.end, self.end + timedelta(days=1)
+        self.assertTrue(overlaps(timeslot, self.start, self.end))
+        self.assertTrue(overlaps(timeslot, next_start, next_end))
+
+        # Each day's exclusions only apply to that day.
+        self.assertFalse(overlaps(
+            timeslot, self.start, self.end, exclude_after_end=True))
+        self.assertTrue(overlaps(
+            timeslot, next_start, next_end, exclude_after_end=True))
+        self.assertTrue(overlaps(
+            timeslot, self.start, self.end, exclude_before_start=True))
+        self.assertFalse(overlaps(
+            timeslot, next_start, next_end, exclude_before_start=True))
+
+
+class DenseWeekTable(TestCase):
+    """Tests tabulation of a week made entirely of 15-minute shows,
+    which is the worst realistic case for the number of rows in a
+    week table.
+
+    See the 'benchmark_week_table' management command for timings.
+
+    """
+    def setUp(self):
+        self.start = datetime(2012, 10, 1, 7)
+        self.duration = timedelta(minutes=15)
+        self.slots_per_day = (
+            int(timedelta(days=1).total_seconds()) // (15 * 60))
+
+    def make_week(self):
+        """Creates seven days' worth of back-to-back 15-minute slots.
+
+        The slots are not saved, as tabulation only needs durations.
+
+        """
+        return [[Timeslot(start_time=self.start, duration=self.duration)
+                 for i in xrange(self.slots_per_day)]
+                for day in xrange(7)]
+
+    def test_row_spans(self):
+        """Tests whether each row of a dense week holds one
+        single-span entry per day.
+
+        """
+        table = WeekTable.tabulate_week_lists(
+            self.make_week(),
+            self.start)
+        self.assertEqual(len(table.rows), self.slots_per_day)
+        for row in table.rows:
+            self.assertEqual(len(row.entries), 7)
+            self.assertEqual(row.see_above, [])
+            for entry in row.entries:
+                self.assertEqual(entry.row_span, 1)
+
+    def test_cache_round_trip(self):
+        """Tests whether a tabulated week survives being stored in,
+        and read back from, the cache.
+
+        """
+        table = WeekTable.tabulate_week_lists(
+            self.make_week(),
+            self.start)
+        cache.set('test_dense_week_table', table)
+        cached = cache.get('test_dense_week_table')
+        cache.delete('test_dense_week_table')
+
+        self.assertIsNotNone(cached)
+        self.assertEqual(len(cached.rows), len(table.rows))
+        self.assertEqual(
+            cached.rows[0].get(0).timeslot.duration,
+            self.duration)
+
+
+class MixedWeekTable(TestCase):
+    """Tests tabulation of a week in which a long show sits beside
+    shorter ones, so that entries span several rows and rows are
+    split on the hour.
+
+    """
+    def setUp(self):
+        self.start = datetime(2012, 10, 1, 7, 30)
+
+    def slot(self, minutes):
+        """Creates an unsaved slot of the given length."""
+        return Timeslot(
+            start_time=self.start,
+            duration=timedelta(minutes=minutes))
+
+    def make_week(self):
+        """Creates a week whose first day opens with a 2-hour show and
+        whose other days open with 45- and 75-minute shows, all
+        followed by 15-minute shows.
+
+        """
+        first_day = [self.slot(120)] + [self.slot(15) for i in xrange(88)]
+        other_days = [
+            [self.slot(45), self.slot(75)] +
+            [self.slot(15) for i in xrange(88)]
+            for day in xrange(6)]
+        return [first_day] + other_days
+
+    def test_row_spans(self):
+        """Tests whether long shows span the rows they cover, and the
+        rows below them point back up to them.
+
+        """
+        week = self.make_week()
+        long_show = week[0][0]
+        short_show, next_show = week[1][0], week[1][1]
+        table = WeekTable.tabulate_week_lists(week, self.start)
+        rows = table.rows
+        self.assertEqual(len(rows), 4 + 88)
+
+        # 07:30 to 08:00, cut short by the hour.
+        self.assertEqual(rows[0].duration, timedelta(minutes=30))
+        self.assertEqual(rows[0].see_above, [])
+        self.assertIs(rows[0].get(0).timeslot, long_show)
+        self.assertEqual(rows[0].get(0).row_span, 4)
+        self.assertIs(rows[0].get(1).timeslot, short_show)
+        self.assertEqual(rows[0].get(1).row_span, 2)
+
+        # 08:00 to 08:15, covered entirely by the row above.
+        self.assertEqual(rows[1].see_above, range(7))
+        self.assertEqual(rows[1].entries, [])
+        self.assertIsNone(rows[1].get(0))
+
+        # 08:15 to 09:00, cut short by the hour.
+        self.assertEqual(rows[2].duration, timedelta(minutes=45))
+        self.assertEqual(rows[2].see_above, [0])
+        self.assertIsNone(rows[2].get(0))
+        self.assertIs(rows[2].get(1).timeslot, next_show)
+        self.assertEqual(rows[2].get(1).row_span, 2)
+        self.assertEqual(rows[2].real_column(1), 0)
+
+        # 09:00 to 09:30, the end of every opening show.
+        self.assertEqual(rows[3].see_above, range(7))
+
+        # From 09:30, one 15-minute show per day per row.
+        for row in rows[4:]:
+            self.assertEqual(row.see_above, [])
+            self.assertEqual(len(row.entries), 7)
+            for entry in row.entries:
+                self.assertEqual(entry.row_span, 1)
+
+
+class BlockRuleResolution(TestCase):
+    """Tests whether compiled block rules match blocks in the same way
+    as the per-item block queries did."""
+    def setUp(self):
+        self.flagship = Block(id=1, name='Flagship', priority=1)
+        self.specialist = Block(id=2, name='Specialist', priority=2)
+        self.overnight = Block(id=3, name='Overnight', priority=3)
+        self.rules = BlockRules(
+            [BlockShowRule(block=self.flagship, show_id=10),
+             BlockShowRule(block=self.specialist, show_id=10)],
+            [BlockRangeRule(
+                block=self.flagship,
+                start_time=timedelta(hours=7),
+                end_time=timedelta(hours=22)),
+             BlockRangeRule(
+                block=self.specialist,
+                start_time=timedelta(hours=18),
+                end_time=timedelta(hours=22)),
+             BlockRangeRule(
+                block=self.overnight,
+                start_time=timedelta(hours=23),
+                end_time=timedelta(hours=31))])
+
+    def test_show_rule(self):
+        """Tests whether the highest priority show rule wins."""
+        self.assertEqual(self.rules.show_block(10), self.specialist)
+        self.assertIsNone(self.rules.show_block(11))
+
+    def test_range_rule(self):
+        """Tests whether the highest priority covering range wins."""
+        self.assertEqual(
+            self.rules.range_block(
+                timedelta(hours=19),
+                timedelta(hours=20)),
+            self.specialist)
+        self.assertEqual(
+            self.rules.range_block(
+                timedelta(hours=8),
+                timedelta(hours=9)),
+            self.flagship)
+        self.assertIsNone(
+            self.rules.range_block(
+                timedelta(hours=21),
+                timedelta(hours=23)))
+
+    def test_range_rule_wrapping(self):
+        """Tests whether a range running over midnight matches slots
+        on the day after it starts.
+
+        """
+        self.assertEqual(
+            self.rules.range_block(
+                timedelta(hours=2),
+                timedelta(hours=3)),
+            self.overnight)
+
+
+class BulkNumbering(TestCase):
+    """Tests the ordinal calculation behind bulk numbering."""
+    def test_ordinals(self):
+        """Tests whether children are numbered from 1 within each
+        parent.
+
+        """
+        self.assertEqual(
+            numbering.ordinals([(1, 10), (1, 12), (1, 15), (2, 11)]),
+            {10: 1, 12: 2, 15: 3, 11: 1})
@@ -0,0 +1,193 @@
+"""The block resolver, which matches shows, seasons and timeslots to
+schedule blocks using an in-memory copy of the block rules.
+
+The block rules are few and rarely change, but are consulted for
+every timeslot shown on a schedule page, so they are loaded once per
+process and compiled into lookup structures here rather than being
+queried for each item.
+
+"""
+
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from schedule.models import Block, BlockRangeRule, BlockShowRule
+from schedule.utils import revision
+
+
+# The longest time, in seconds, that a process keeps its compiled
+# block rules before reloading them.  Block and rule changes bump the
+# schedule revision, which makes every process reload its rules; this
+# is a backstop.
+BLOCK_RULES_TIMEOUT = getattr(
+    settings,
+    'BLOCK_RULES_TIMEOUT',
+    60 * 60)
+
+# The process-wide compiled block rules, or None if they need
+# (re)loading.
+_rules = None
+
+
+class BlockRules(object):
+    """A compiled set of block rules.
+
+    Where several rules match an item, the rule whose block has the
+    highest priority number wins, as in the original per-item
+    queries.
+
+    """
+    def __init__(self, show_rules, range_rules, schedule_revision=None):
+        """Compiles the given block rules.
+
+        Keyword arguments:
+        show_rules -- an iterable of BlockShowRules
+        range_rules -- an iterable of BlockRangeRules
+        schedule_revision -- the schedule revision the rules were
+            loaded at, or None if the rules do not follow the
+            schedule revision (default: None)
+        """
+        self.schedule_revision = schedule_revision
+        self.show_blocks = {}
+        for rule in show_rules:
+            best = self.show_blocks.get(rule.show_id)
+            if best is None or rule.block.priority > best.priority:
+                self.show_blocks[rule.show_id] = rule.block
+
+        # Sorted by range start, so that the rules starting before a
+        # given time of day are always a prefix of the list.
+        self.range_rules = sorted(
+            range_rules,
+            key=lambda rule: rule.start_time)
+        self.range_starts = [rule.start_time for rule in self.range_rules]
+
+        self.loaded_at = time.time()
+
+    def is_stale(self):
+        """Returns True if these rules are too old to be trusted,
+        either because the schedule revision has changed since they
+        were loaded or because they have been kept too long.
+
+        """
+        return (
+            (self.schedule_revision is not None and
+             self.schedule_revision != revision.current()) or
+            time.time() - self.loaded_at > BLOCK_RULES_TIMEOUT)
+
+    def show_block(self, show_id):
+        """Returns the block directly assigned to the show with the
+        given ID, or None if there is no such block.
+
+        """
+        return self.show_blocks.get(show_id)
+
+    def range_block(self, slot_start, slot_end):
+        """Returns the block whose time range covers the given range,
+        or None if there is no such block.
+
+        Keyword arguments:
+        slot_start -- the start of the range to match, as a
+            timedelta from local midnight
+        slot_end -- the end of the range to match, as a timedelta
+            from local midnight
+        """
+        best = None
+        # As well as the range as given, try the range projected
+        # forwards one day, so that block ranges starting the day
+        # before the slot and ending on the day of the slot are
+        # considered correctly.
+        day = timedelta(days=1)
+        for start, end in ((slot_start, slot_end),
+                           (slot_start + day, slot_end + day)):
+            started = self.range_rules[:bisect_right(
+                self.range_starts,
+                start)]
+            for rule in started:
+                if rule.end_time >= end and (
+                        best is None
+                        or rule.block.priority > best.priority):
+                    best = rule.block
+        return best
+
+    def timeslot_block(self, timeslot):
+        """Returns the block that the given timeslot is in, if any.
+
+        See Timeslot.block.
+
+        """
+        # Show (and season, which defers to show) rules take
+        # precedence.
+        block = self.show_block(timeslot.season.show_id)
+        if block is None:
+            # Get start as distance from midnight, and end as
+            # distance plus duration
+            slot_start = timeslot.start_time - timeslot.start_time.replace(
+                hour=0,
+                minute=0,
+                second=0,
+                microsecond=0)
+            slot_end = slot_start + timeslot.duration
+            assert slot_start < slot_end, "Slot starts after end."
+
+            # Because the block range is in local time and the slot
+            # dates are in UTC, we'll need to add the local time's UTC
+            # offset.
+            utc = timeslot.start_time.astimezone(
+                timezone.get_current_timezone()).utcoffset()
+            block = self.range_block(slot_start + utc, slot_end + utc)
+        return block
+
+    def resolve(self, timeslots):
+        """Returns a list of the blocks of each of the given
+        timeslots, in order.
+
+        """
+        return [self.timeslot_block(timeslot) for timeslot in timeslots]
+
+
+def rules():
+    """Returns the process-wide compiled BlockRules, loading them from
+    the database if they are missing or stale.
+
+    """
+    global _rules
+    if _rules is None or _rules.is_stale():
+        # The revision is read first, so that a change made while
+        # loading makes the rules stale straight away.
+        current = revision.current()
+        _rules = BlockRules(
+            BlockShowRule.objects.select_related('block'),
+            BlockRangeRule.objects.select_related('block'),
+            current)
+    return _rules
+
+
+def resolve(timeslots):
+    """Returns a list of the blocks of each of the given timeslots, in
+    order, using the process-wide block rules.
+
+    """
+    return rules().resolve(timeslots)
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+@receiver(post_save, sender=BlockRangeRule)
+@receiver(post_delete, sender=BlockRangeRule)
+@receiver(post_save, sender=BlockShowRule)
+@receiver(post_delete, sender=BlockShowRule)
+def invalidate_rules(sender, **kwargs):
+    """Discards this process's compiled block rules whenever a block
+    or block rule changes.
+
+    Other processes notice the change through the schedule revision.
+
+    """
+    global _rules
+    _rules = None
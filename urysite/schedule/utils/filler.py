@@ -17,6 +17,60 @@ programming.
 from schedule.models import Term, Show, Season, Timeslot
 
 
+class FillerContext(object):
+    """The data shared by all filler slots created for one range.
+
+    Every filler slot in a range belongs to the same filler show, and
+    usually to one of a small handful of terms, so the context looks
+    the show up once (and only when the first filler slot is actually
+    needed) instead of once per slot, and shares one filler season
+    between all the slots in each term.
+
+    """
+    def __init__(self, start_time, end_time):
+        """Creates a filler context for the given range.
+
+        Keyword arguments:
+        start_time -- the start of the range being filled, as an
+            aware datetime
+        end_time -- the end of the range being filled, as an aware
+            datetime
+        """
+        self.start_time = start_time
+        self.end_time = end_time
+        self._show = None
+        self._seasons = {}
+
+    def show(self):
+        """Retrieves the filler show, loading it if necessary."""
+        if self._show is None:
+            self._show = Show.objects.get(pk=-1)
+        return self._show
+
+    def term(self, start_time):
+        """Retrieves the term that a filler slot starting at the given
+        time should use; see 'term'.
+
+        """
+        return term(start_time, None)
+
+    def season(self, start_time):
+        """Retrieves the filler season usable for a filler slot
+        starting at the given time.
+
+        """
+        this_term = self.term(start_time)
+        if this_term is None:
+            raise ValueError(
+                "Tried to create filler show outside a term.")
+        if this_term.id not in self._seasons:
+            self._seasons[this_term.id] = Season(
+                show=self.show(),
+                term=this_term,
+                date_submitted=this_term.start_date)
+        return self._seasons[this_term.id]
+
+
 def show(start_time, duration):
     """Retrieves a parent show usable for filler timeslots.
 
@@ -48,7 +102,7 @@ def term(start_time, duration):
     return term
 
 
-def season(start_time, duration):
+def season(start_time, duration, context=None):
     """Retrieves a parent season usable for filler timeslots.
 
     Keyword arguments:
@@ -56,7 +110,13 @@ def season(start_time, duration):
         created, as an aware datetime
     duration -- the duration of the filler timeslot being
         created, as a timedelta
+    context -- if given, a FillerContext from which the show and
+        term are taken instead of being looked up anew
+        (default: None)
     """
+    if context is not None:
+        return context.season(start_time)
+
     this_term = term(start_time, duration)
     if this_term is None:
         raise ValueError(
@@ -67,7 +127,7 @@ def season(start_time, duration):
         date_submitted=this_term.start_date)
 
 
-def timeslot(start_time, end_time=None, duration=None):
+def timeslot(start_time, end_time=None, duration=None, context=None):
     """Creates a new timeslot that is bound to the URY Jukebox.
 
     Keyword arguments:
@@ -79,6 +139,9 @@ def timeslot(start_time, end_time=None, duration=None):
     duration -- the duration of the filler timeslot being
         created, as a timedelta; this must be None if end_time
         is used
+    context -- if given, a FillerContext shared between all the
+        filler timeslots being created for one range
+        (default: None)
      """
     if duration is None:
         if end_time is None:
@@ -89,26 +152,35 @@ def timeslot(start_time, end_time=None, duration=None):
         raise ValueError('Do not specify both end and duration.')
 
     return Timeslot(
-        season=season(start_time, end_time),
+        season=season(start_time, duration, context),
         start_time=start_time,
         duration=duration)
 
 
 ## FILLING ALGORITHM
 
-def fill(timeslots, start_time, end_time):
+def fill(timeslots, start_time, end_time, context=None):
     """Fills any gaps in the given timeslot list with filler slots,
     such that the list is fully populated from the given start time
     to the given end time.
 
+    All of the filler slots share one FillerContext, so the filler
+    show and terms are looked up at most once per call however many
+    gaps there are.
+
     Keyword arguments:
     timeslots -- the list of timeslots, may be empty
     start_time -- the start date/time
     end_time -- the end date/time
+    context -- the FillerContext to use; if None, one covering the
+        given range is created (default: None)
 
     """
+    if context is None:
+        context = FillerContext(start_time, end_time)
+
     if len(timeslots) == 0:
-        timeslots = [timeslot(start_time, end_time)]
+        timeslots = [timeslot(start_time, end_time, context=context)]
     else:
         # Start by filling in the ends
         if timeslots[0].start_time > start_time:
@@ -116,12 +188,14 @@ def fill(timeslots, start_time, end_time):
                 0,
                 timeslot(
                     start_time,
-                    timeslots[0].start_time))
+                    timeslots[0].start_time,
+                    context=context))
         if timeslots[-1].end_time() < end_time:
             timeslots.append(
                 timeslot(
                     timeslots[-1].end_time(),
-                    end_time))
+                    end_time,
+                    context=context))
         # Next, fill in everything else
         # We're doing this by comparing two shows at a time to
         # see if they follow on from each other; if they don't
@@ -136,7 +210,8 @@ def fill(timeslots, start_time, end_time):
                     i + offset + 1,
                     timeslot(
                         left.end_time(),
-                        right.start_time))
+                        right.start_time,
+                        context=context))
                 # The list has grown by one, so we'll need to
                 # factor that into the index calculations
                 offset += 1
@@ -5,7 +5,7 @@
 from schedule.models import Timeslot
 from schedule.utils import filler
 from django.utils import timezone
-from django.db.models import F
+from django.db.models import F, Q
 
 
 def coming_up(date=None, quantity=10, with_filler_timeslots=True):
@@ -33,15 +33,11 @@ def coming_up(date=None, quantity=10, with_filler_timeslots=True):
     if date is None:
         date = timezone.now()
 
-    query = Timeslot.objects.filter(
-        duration__gte=date - F('start_time')).order_by('start_time')
-    coming_up_unfilled = \
-        list(query)[:min(query.count(), quantity)] \
-        if query.exists() else []
+    coming_up_unfilled = list(upcoming_query(date)[:quantity])
 
     if with_filler_timeslots:
         end = date if not coming_up_unfilled else \
-            coming_up_unfilled[-1]
+            coming_up_unfilled[-1].end_time()
         filled_up = filler.fill(
             coming_up_unfilled,
             date,
@@ -52,3 +48,62 @@ def coming_up(date=None, quantity=10, with_filler_timeslots=True):
     else:
         coming_up = coming_up_unfilled
     return coming_up
+
+
+def upcoming(date=None, with_filler_timeslots=True, chunk_size=50):
+    """Lazily iterates over every timeslot active at or after 'date',
+    in order of start time.
+
+    This is for windows too large to fetch at once; the timeslots are
+    fetched 'chunk_size' at a time, so memory use stays flat however
+    far the iteration goes.  For short lists, use 'coming_up'.
+
+    Keyword arguments:
+    date -- the reference point from which the iteration starts;
+        the first timeslot is the timeslot active at the moment of
+        time 'date' refers to (default: now)
+    with_filler_timeslots -- if True, gaps between timeslots are
+        filled in with filler timeslots (default: True)
+    chunk_size -- the number of timeslots to fetch per query, as a
+        positive integer (default: 50)
+    """
+    if chunk_size <= 0:
+        raise ValueError("'chunk_size' must be positive.")
+    if date is None:
+        date = timezone.now()
+
+    query = upcoming_query(date).order_by('start_time', 'id')
+    context = filler.FillerContext(date, None)
+    last_end = date
+    chunk = list(query[:chunk_size])
+    while chunk:
+        for timeslot in chunk:
+            if with_filler_timeslots and last_end < timeslot.start_time:
+                yield filler.timeslot(
+                    last_end,
+                    timeslot.start_time,
+                    context=context)
+            yield timeslot
+            last_end = max(last_end, timeslot.end_time())
+
+        # Carry on from just after the last timeslot seen (keyset
+        # pagination), rather than using ever-growing offsets.
+        last = chunk[-1]
+        chunk = list(query.filter(
+            Q(start_time__gt=last.start_time) |
+            Q(start_time=last.start_time, id__gt=last.id))[:chunk_size])
+
+
+def upcoming_query(date):
+    """Returns a QuerySet, in order of start time, of the timeslots
+    that end at or after 'date'.
+
+    The query is bounded on 'start_time' (see
+    schedule.utils.range.overlap_candidates), so the database can use
+    the index on that column together with a LIMIT rather than
+    scanning every timeslot.
+
+    """
+    return Timeslot.objects.filter(
+        start_time__gte=date - Timeslot.longest_duration(),
+        duration__gte=date - F('start_time')).order_by('start_time')
@@ -0,0 +1,136 @@
+"""The 'now playing' service, which works out what is on air and up
+next and caches the answer until it next changes.
+
+Everything that needs to know the current show (the site header, the
+broadcast context processor, laconia's now/next feed and so on)
+should go through 'current' rather than running its own range query.
+
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from people.utils.by_lines import by_lines
+from schedule.models import Term
+from schedule.utils import revision
+from schedule.utils.list import coming_up
+
+
+# How long to trust a now-playing snapshot if nothing in the schedule
+# says when it will change (for example, when there are no timeslots
+# at all).
+FALLBACK_LIFETIME = timedelta(minutes=1)
+
+# The process-local copy of the current snapshot, tagged with the
+# schedule revision it was worked out at.
+_current = (None, None)
+
+
+class NowPlaying(object):
+    """A snapshot of the schedule at a given moment in time.
+
+    """
+    def __init__(self, date, on_air, up_next, term, preterm, expires):
+        """Creates a now-playing snapshot.
+
+        Keyword arguments:
+        date -- the moment the snapshot was taken, as an aware
+            datetime
+        on_air -- the timeslot on air at 'date', possibly a filler
+            timeslot
+        up_next -- the timeslot following 'on_air', or None
+        term -- the term 'date' lies in, or None
+        preterm -- if 'term' is None, the last term before 'date' (if
+            any); else None
+        expires -- the moment at which this snapshot stops being
+            valid, usually the end of 'on_air'
+        """
+        self.date = date
+        self.on_air = on_air
+        self.up_next = up_next
+        self.term = term
+        self.preterm = preterm
+        self.expires = expires
+
+    def shows(self):
+        """Returns a list of the on-air and up-next timeslots that
+        exist, in that order.
+
+        """
+        return [slot for slot in (self.on_air, self.up_next)
+                if slot is not None]
+
+    def is_valid(self, date=None):
+        """Returns True if this snapshot still holds at the given
+        moment in time (default: now).
+
+        """
+        if date is None:
+            date = timezone.now()
+        return self.date <= date < self.expires
+
+    def seconds_left(self, date=None):
+        """Returns the whole number of seconds until this snapshot
+        expires, counting from the given moment in time (default:
+        now).
+
+        """
+        if date is None:
+            date = timezone.now()
+        left = self.expires - date
+        return max(0, left.days * 24 * 60 * 60 + left.seconds)
+
+
+def at(date):
+    """Works out a now-playing snapshot for the given moment in time.
+
+    This always queries the schedule; use 'current' for the cached
+    snapshot of the present moment.
+
+    """
+    shows = coming_up(date, quantity=2)
+    # Everything showing the snapshot shows the by-lines too, so work
+    # them out before the snapshot is cached.
+    by_lines(shows)
+    on_air = shows[0] if len(shows) >= 1 else None
+    up_next = shows[1] if len(shows) >= 2 else None
+
+    term = Term.of(date)
+    preterm = Term.before(date) if term is None else None
+
+    # The snapshot changes when the current show ends, or when the
+    # term does (as that changes whether we're broadcasting).
+    if on_air is not None and on_air.end_time() > date:
+        expires = on_air.end_time()
+    else:
+        expires = date + FALLBACK_LIFETIME
+    if term is not None:
+        expires = min(expires, term.end_date)
+
+    return NowPlaying(date, on_air, up_next, term, preterm, expires)
+
+
+def current():
+    """Retrieves the now-playing snapshot for the present moment.
+
+    The snapshot is cached both in this process and in the Django
+    cache until the next show boundary, or until the schedule
+    changes, whichever comes first.
+
+    """
+    global _current
+    now = timezone.now()
+    schedule_revision = revision.current()
+
+    cached_revision, snapshot = _current
+    if cached_revision != schedule_revision or not (
+            snapshot and snapshot.is_valid(now)):
+        cache_key = revision.key('now_playing')
+        snapshot = cache.get(cache_key)
+        if snapshot is None or not snapshot.is_valid(now):
+            snapshot = at(now)
+            cache.set(cache_key, snapshot, snapshot.seconds_left(now))
+        _current = (schedule_revision, snapshot)
+    return snapshot
@@ -0,0 +1,66 @@
+"""Functions for working out the relative numbers of many seasons and
+timeslots at once.
+
+Season and timeslot numbers appear in every show database URL, so a
+schedule page needs one for each link it renders.  Numbering the
+whole page's worth of items here takes two queries in total, after
+which 'number' and 'get_absolute_url' on each item cost nothing.
+
+"""
+
+from schedule.models import Season, Timeslot
+
+
+def ordinals(pairs):
+    """Given (parent ID, child ID) pairs sorted by parent and then by
+    the child ordering, returns a dict mapping each child ID to its
+    number within its parent, starting from 1.
+
+    """
+    numbers = {}
+    last_parent = None
+    number = 0
+    for parent_id, child_id in pairs:
+        number = number + 1 if parent_id == last_parent else 1
+        last_parent = parent_id
+        numbers[child_id] = number
+    return numbers
+
+
+def number_seasons(seasons):
+    """Works out and caches the number of each of the given seasons.
+
+    Seasons that are not in the database (such as filler seasons) are
+    skipped.
+
+    """
+    seasons = [season for season in seasons if season.id is not None]
+    if seasons:
+        numbers = ordinals(
+            Season.objects
+            .filter(show__in=set(season.show_id for season in seasons))
+            .order_by('show', *Season._meta.ordering)
+            .values_list('show', 'id'))
+        for season in seasons:
+            season._number = numbers[season.id]
+
+
+def number_timeslots(timeslots):
+    """Works out and caches the number of each of the given
+    timeslots, and of their seasons.
+
+    Timeslots that are not in the database (such as filler timeslots)
+    are skipped.
+
+    """
+    timeslots = [timeslot for timeslot in timeslots
+                 if timeslot.id is not None]
+    if timeslots:
+        numbers = ordinals(
+            Timeslot.objects
+            .filter(season__in=set(slot.season_id for slot in timeslots))
+            .order_by('season', *Timeslot._meta.ordering)
+            .values_list('season', 'id'))
+        for timeslot in timeslots:
+            timeslot._number = numbers[timeslot.id]
+        number_seasons(timeslot.season for timeslot in timeslots)
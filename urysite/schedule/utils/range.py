@@ -11,6 +11,72 @@ from datetime import timedelta
 from django.utils import timezone
 
 
+def overlap_candidates(start, end):
+    """Returns a QuerySet of every timeslot that could overlap the
+    range defined by two datetime objects.
+
+    The result is a superset of the overlapping timeslots, bounded
+    purely on 'start_time' so that the database can answer it with
+    the index on that column rather than scanning every timeslot.
+    No timeslot can start any earlier than the longest timeslot's
+    duration before the range and still reach into it, so that
+    duration gives the lower bound.
+
+    Seasons and shows are fetched alongside the timeslots, as working
+    out a timeslot's block (see schedule.utils.blocks) needs its
+    season, and inheriting its metadata (see metadata.utils.prefetch)
+    needs both.
+
+    Keyword arguments:
+    start -- the start of the range, as a datetime
+    end -- the end of the range, as a datetime
+
+    """
+    return Timeslot.objects.select_related('season__show').filter(
+        start_time__gte=start - Timeslot.longest_duration(),
+        start_time__lte=end)
+
+
+def overlaps(timeslot,
+             start,
+             end,
+             exclude_before_start=False,
+             exclude_after_end=False,
+             exclude_subsuming=False):
+    """Decides in memory whether a timeslot would be part of the
+    range defined by two datetime objects.
+
+    This gives the same answer as the database filtering in
+    'ScheduleRange.between' with the same arguments, and is used to
+    divide the result of one large range query into smaller ranges.
+
+    Keyword arguments:
+    timeslot -- the timeslot to check
+    start -- the start of the range, as a datetime
+    end -- the end of the range, as a datetime
+    exclude_before_start, exclude_after_end, exclude_subsuming --
+        see 'ScheduleRange.between'
+
+    """
+    slot_start = timeslot.start_time
+    slot_end = timeslot.end_time()
+
+    # These mirror the 'exclude' calls in 'between', in order.
+    if slot_start < start and slot_end <= start:
+        result = False
+    elif slot_start >= end and slot_end > end:
+        result = False
+    elif exclude_before_start and slot_start < start and slot_end <= end:
+        result = False
+    elif exclude_after_end and slot_start >= start and slot_end > end:
+        result = False
+    elif exclude_subsuming and slot_start < start and slot_end > end:
+        result = False
+    else:
+        result = True
+    return result
+
+
 class ScheduleRange(object):
     """Class of the result of timeslots-in-range queries.
 
@@ -79,10 +145,11 @@ class ScheduleRange(object):
         """
         # THIS IS NOT A TRIVIAL FUNCTION!
 
-        # Start with ALL the timeslots (Django doesn't execute
-        # database queries immediately so this is perfectly fine,
-        # we'll be whittling this query down soon!
-        timeslots = Timeslot.objects.all()
+        # Start with every timeslot that could possibly overlap the
+        # range (Django doesn't execute database queries immediately
+        # so this is perfectly fine, we'll be whittling this query
+        # down soon!)
+        timeslots = overlap_candidates(start, end)
 
         # ADVICE: Whenever you see an inequality on duration, just
         # mentally move the subtraction of 'start_time' over to
@@ -218,12 +285,79 @@ class ScheduleRange(object):
 
         """
         if split_days is True:
-            result = [cls.day(
-                date + timedelta(days=day),
-                **keywords) for day in xrange(0, 7)]
+            result = cls.days(date, 7, **keywords)
         else:
             result = cls.within(
                 date,
                 timedelta(weeks=1),
                 **keywords)
         return result
+
+    @classmethod
+    def days(cls,
+             date=None,
+             count=1,
+             exclude_before_start=False,
+             exclude_after_end=False,
+             exclude_subsuming=False,
+             with_filler_timeslots=True):
+        """Lists the schedule ranges for 'count' consecutive days,
+        the first starting at the given moment in time.
+
+        The result is the same as listing the result of 'day' applied
+        to each day in turn with the given arguments, including
+        timeslots that cross a day boundary appearing in both days.
+        However, the timeslots are fetched with one query over the
+        whole period and then split up in memory, and all filler
+        timeslots share one filler context.
+
+        'date' defaults to the current moment in time.
+
+        Keyword arguments:
+        date -- the start of the first day, as a datetime
+        count -- the number of days to list (default: 1)
+        exclude_before_start, exclude_after_end, exclude_subsuming,
+            with_filler_timeslots -- see 'between'; these apply to
+            each day individually
+
+        """
+        if date is None:
+            date = timezone.now()
+        period_end = date + timedelta(days=count)
+
+        # No exclusions here: each day does its own, and the
+        # unexcluded period is a superset of every day within it.
+        timeslots = list(cls.between(
+            date,
+            period_end,
+            with_filler_timeslots=False).data)
+        context = filler.FillerContext(date, period_end)
+
+        result = []
+        for day in xrange(count):
+            start = date + timedelta(days=day)
+            end = start + timedelta(days=1)
+            day_timeslots = [
+                timeslot for timeslot in timeslots
+                if overlaps(
+                    timeslot,
+                    start,
+                    end,
+                    exclude_before_start,
+                    exclude_after_end,
+                    exclude_subsuming)]
+            if with_filler_timeslots:
+                day_timeslots = filler.fill(
+                    day_timeslots,
+                    start,
+                    end,
+                    context)
+            result.append(cls(
+                day_timeslots,
+                start,
+                end,
+                exclude_before_start,
+                exclude_after_end,
+                exclude_subsuming,
+                with_filler_timeslots))
+        return result
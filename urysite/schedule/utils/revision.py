@@ -0,0 +1,93 @@
+"""A revision counter for the schedule, and functions for caching
+things derived from the schedule against it.
+
+The revision goes up whenever anything that could change how the
+schedule looks (timeslots, seasons, shows, their metadata, blocks,
+block rules and terms) is saved or deleted.  Cache keys made with
+'key' include the revision, so anything cached against an older
+schedule is simply never looked up again and ages out of the cache by
+itself.
+
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+
+from urysite import cache_versions
+
+
+# The cache key under which the revision counter is stored (see
+# urysite.cache_versions).
+REVISION_CACHE_KEY = 'schedule_revision'
+
+# How long, in seconds, things cached against a revision are kept.
+# As the keys change with the revision, this only affects how soon
+# unused entries are thrown away.
+CACHE_TIMEOUT = getattr(settings, 'SCHEDULE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def current():
+    """Returns the current schedule revision."""
+    return cache_versions.current(REVISION_CACHE_KEY)
+
+
+def bump(sender=None, **kwargs):
+    """Increases the schedule revision, invalidating everything
+    cached against the previous revision.
+
+    This has the signature of a Django signal receiver so it can be
+    connected directly to model signals; see 'watch'.
+
+    """
+    cache_versions.bump(REVISION_CACHE_KEY)
+
+
+def watch(*models):
+    """Makes saving or deleting an instance of any of the given
+    models increase the schedule revision.
+
+    """
+    for model in models:
+        post_save.connect(
+            bump,
+            sender=model,
+            dispatch_uid='schedule_revision_save_{0}'.format(
+                model.__name__))
+        post_delete.connect(
+            bump,
+            sender=model,
+            dispatch_uid='schedule_revision_delete_{0}'.format(
+                model.__name__))
+
+
+def key(*parts):
+    """Makes a cache key from the given parts and the current
+    schedule revision.
+
+    The parts must not contain whitespace, as memcached keys may not.
+
+    """
+    return ':'.join(
+        ['schedule', str(current())] + [unicode(part) for part in parts])
+
+
+def cached(parts, function, timeout=CACHE_TIMEOUT):
+    """Retrieves the value cached for the given key parts at the
+    current schedule revision, calling 'function' to work it out and
+    caching the result if there is no such value.
+
+    Keyword arguments:
+    parts -- an iterable of key parts; see 'key'
+    function -- a function taking no arguments that computes the
+        value to cache
+    timeout -- the time in seconds to keep the value for
+        (default: CACHE_TIMEOUT)
+
+    """
+    cache_key = key(*parts)
+    value = cache.get(cache_key)
+    if value is None:
+        value = function()
+        cache.set(cache_key, value, timeout)
+    return value
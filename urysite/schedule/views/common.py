@@ -1,5 +1,7 @@
+import calendar
 from datetime import date, time, datetime, timedelta
 from schedule.models import Timeslot
+from django.conf import settings
 from django.utils import timezone
 
 from schedule.views.contrib import iso_to_gregorian
@@ -12,6 +14,19 @@ URY_START = time(
     minute=0,
     second=0)
 
+# The metadata keys that the schedule views show for each timeslot,
+# and so fetch in bulk up front.
+SCHEDULE_METADATA = ('title', 'description')
+
+# How long, in seconds, the schedule views cache their timeslot lists
+# and tables.  Schedule changes discard them straight away, but the
+# metadata fetched with them is only current as of when they were
+# built, so this bounds how late future-dated metadata shows up.
+SCHEDULE_VIEW_CACHE_TIMEOUT = getattr(
+    settings,
+    'SCHEDULE_VIEW_CACHE_TIMEOUT',
+    15 * 60)
+
 
 def ury_start_on_date(date):
     """Returns a new datetime representing the nominal start of URY
@@ -41,3 +56,10 @@ def get_week_start(year, week):
     """
     return get_week_day(year, week, 1)
 
+
+def timestamp(moment):
+    """Converts an aware datetime into a UNIX timestamp, for use in
+    (for example) cache keys.
+
+    """
+    return calendar.timegm(moment.utctimetuple())
@@ -4,8 +4,13 @@ services.
 """
 
 from datetime import date, timedelta
+from metadata.utils.prefetch import prefetch
+from people.utils.by_lines import by_lines
+from schedule.utils import numbering, revision
 from schedule.utils.range import ScheduleRange
 from schedule.views.common import ury_start_on_date, get_week_day
+from schedule.views.common import timestamp, SCHEDULE_METADATA
+from schedule.views.common import SCHEDULE_VIEW_CACHE_TIMEOUT
 from django.shortcuts import render
 from django.utils import timezone
 from schedule.models import Term
@@ -17,6 +22,36 @@ from schedule.models import Term
 ## Only export the actual views that are reachable through URLconf
 ## Thanks!
 
+def day_list(day_start):
+    """Retrieves the list of timeslots for the day starting at the
+    given date.
+
+    The list is cached against the schedule revision, so it is
+    rebuilt after the schedule changes, and otherwise every
+    SCHEDULE_VIEW_CACHE_TIMEOUT seconds so that metadata coming into
+    effect is picked up.  The timeslots are numbered,
+    and their titles, descriptions and by-lines fetched, in bulk
+    before caching, so they are free to render.
+
+    """
+    def make_list():
+        timeslots = list(ScheduleRange.day(
+            day_start,
+            exclude_before_start=False,
+            exclude_after_end=False,
+            exclude_subsuming=False,
+            with_filler_timeslots=True).data)
+        numbering.number_timeslots(timeslots)
+        prefetch(timeslots, SCHEDULE_METADATA)
+        by_lines(timeslots)
+        return timeslots
+
+    return revision.cached(
+        ('day_list', timestamp(day_start)),
+        make_list,
+        SCHEDULE_VIEW_CACHE_TIMEOUT)
+
+
 def schedule_day_from_date(request, day_start):
     """The day-at-a-glance schedule view, with the day specfied by
     a date object (including the start time of the schedule).
@@ -31,12 +66,7 @@ def schedule_day_from_date(request, day_start):
     prev_year, prev_week, prev_day = prev_start.isocalendar()
 
     term = Term.of(day_start)
-    schedule = None if not term else ScheduleRange.day(
-        day_start,
-        exclude_before_start=False,
-        exclude_after_end=False,
-        exclude_subsuming=False,
-        with_filler_timeslots=True).data
+    schedule = None if not term else day_list(day_start)
 
     return render(
         request,
@@ -2,12 +2,12 @@
 
 """
 
-from schedule.utils import list
+from schedule.utils import now_playing
 from django.shortcuts import render
 
 
 def header(request):
-    coming_up_list = list.coming_up(quantity=2)
+    coming_up_list = now_playing.current().shows()
     length = len(coming_up_list)
     if length == 1:
         on_air = coming_up_list[0]
@@ -3,20 +3,28 @@
 """
 
 from django.views.generic import DetailView
-from schedule.models import Show, Season, Timeslot
-from django.shortcuts import get_object_or_404
+from schedule.models import Season, Timeslot
 from django.http import Http404
 
 
+def nth(query, n):
+    """Returns the 'n'th item of a QuerySet, counting from 0, or None
+    if there is no such item.
+
+    This fetches at most the one item, rather than counting the
+    whole QuerySet first.
+
+    """
+    items = list(query[n:n + 1])
+    return items[0] if items else None
+
+
 def relative_season(show_id, season_num):
     """Attempts to find the 'season_num'th season of the show with
     ID 'show_id', where the count starts from 0.
 
     """
-    show = get_object_or_404(Show, pk=show_id)
-    return (show.season_set.all()[season_num]
-            if show.season_set.count() > season_num
-            else None)
+    return nth(Season.objects.filter(show=show_id), season_num)
 
 
 def relative_timeslot(show_id, season_num, timeslot_num):
@@ -26,8 +34,8 @@ def relative_timeslot(show_id, season_num, timeslot_num):
 
     """
     season = relative_season(show_id, season_num)
-    return (season.timeslot_set.all()[timeslot_num]
-            if (season and season.timeslot_set.count() > timeslot_num)
+    return (nth(season.timeslot_set.all(), timeslot_num)
+            if season
             else None)
 
 
@@ -4,8 +4,13 @@ services.
 """
 
 from datetime import datetime, timedelta
+from metadata.utils.prefetch import prefetch
+from people.utils.by_lines import by_lines
+from schedule.utils import numbering, revision
 from schedule.utils.range import ScheduleRange
 from schedule.views.common import ury_start_on_date, get_week_start
+from schedule.views.common import timestamp, SCHEDULE_METADATA
+from schedule.views.common import SCHEDULE_VIEW_CACHE_TIMEOUT
 from schedule.views.week_table import WeekTable
 from django.shortcuts import render
 from schedule.models import Term
@@ -17,6 +22,38 @@ from schedule.models import Term
 ## Only export the actual views that are reachable through URLconf
 ## Thanks!
 
+def week_table(week_start):
+    """Retrieves the tabulated schedule for the week starting at the
+    given date.
+
+    The table is cached against the schedule revision, so it is
+    rebuilt after the schedule changes, and otherwise every
+    SCHEDULE_VIEW_CACHE_TIMEOUT seconds so that metadata coming into
+    effect is picked up.  The timeslots are numbered,
+    and their titles, descriptions and by-lines fetched, in bulk
+    before caching, so they are free to render.
+
+    """
+    def make_table():
+        days = ScheduleRange.week(
+            week_start,
+            split_days=True,
+            exclude_before_start=False,
+            exclude_after_end=False,
+            exclude_subsuming=False,
+            with_filler_timeslots=True)
+        timeslots = [timeslot for day in days for timeslot in day.data]
+        numbering.number_timeslots(timeslots)
+        prefetch(timeslots, SCHEDULE_METADATA)
+        by_lines(timeslots)
+        return WeekTable.tabulate(days)
+
+    return revision.cached(
+        ('week_table', timestamp(week_start)),
+        make_table,
+        SCHEDULE_VIEW_CACHE_TIMEOUT)
+
+
 def schedule_week_from_date(request, week_start):
     """The week-at-a-glance schedule view, with the week specified
     by a date object denoting its starting day.
@@ -31,14 +68,7 @@ def schedule_week_from_date(request, week_start):
     prev_year, prev_week, prev_day = prev_start.isocalendar()
 
     term = Term.of(week_start)
-    schedule = None if not term else WeekTable.tabulate(
-        ScheduleRange.week(
-            week_start,
-            split_days=True,
-            exclude_before_start=False,
-            exclude_after_end=False,
-            exclude_subsuming=False,
-            with_filler_timeslots=True))
+    schedule = None if not term else week_table(week_start)
 
     return render(
         request,
@@ -11,92 +11,116 @@ functionality is a true hero.
 from datetime import timedelta
 
 
-class WeekTable(object):
-    """A weekly schedule, in tabular form and ready to be outputted
-    in a template.
+class IncorrectlySizedRowException(Exception):
+    """Exception thrown when an add operation that would make
+    a row too large occurs, or when a read operation on a row
+    that is insufficiently sized happens."""
+    pass
+
+
+class Entry(object):
+    """An entry in a schedule table row.
+
+    Schedule table entries depict part of a show timeslot
+    that airs inside the time period of its parent row.
+
+    The booleans is_start and is_end state whether this entry
+    marks the start and/or the end of the referenced show
+    respectively.
 
     """
+    def __init__(self, timeslot):
+        self.row_span = 1
+        self.timeslot = timeslot
 
-    class Row(object):
-        """A row in a schedule table."""
-        class IncorrectlySizedRowException(Exception):
-            """Exception thrown when an add operation that would make
-            a row too large occurs, or when a read operation on a row
-            that is insufficiently sized happens."""
-            pass
-
-        class Entry(object):
-            """An entry in a schedule table row.
-            
-            Schedule table entries depict part of a show timeslot
-            that airs inside the time period of its parent row.
-            
-            The booleans is_start and is_end state whether this entry
-            marks the start and/or the end of the referenced show
-            respectively.
-            
-            """
-            def __init__(self, timeslot):
-                self.row_span = 1
-                self.timeslot = timeslot 
-
-        def __init__(self, start_time, duration):
-            self.start_time = start_time
-            self.entries = []
-            self.see_above = []
-            self.duration = duration
-
-        def add(self, timeslot):
-            """Adds a timeslot to the row.
-            
-            No inter-row compressing is done at this stage.
-            
-            """
-            if len(self.entries) == 7:
-                # We don't want more than seven days!
-                raise IncorrectlySizedRowException
-            else:
-                self.entries.append(
-                    WeekTable.Row.Entry(
-                        timeslot))
 
-        def real_column(self, column):
-            """Returns the actual index of a given column in the row. 
+class Row(object):
+    """A row in a schedule table."""
+    # Kept as attributes for code written against the nested classes.
+    IncorrectlySizedRowException = IncorrectlySizedRowException
+    Entry = Entry
 
-            The reason the column number and entries index may be
-            different is because of row compression.
+    def __init__(self, start_time, duration):
+        self.start_time = start_time
+        self.entries = []
+        self.see_above = []
+        self.duration = duration
+        # Logical column -> entry, or None if compressed away.
+        # This makes 'get' constant-time regardless of how many
+        # columns have been compressed.
+        self.columns = []
 
-            """
-            return column - \
-                len([x for x in self.see_above if x < column])
+    def add(self, timeslot):
+        """Adds a timeslot to the row.
 
-        def get(self, column):
-            """Gets the entry at the given column.
+        No inter-row compressing is done at this stage.
 
-            If the row has been compressed (some of its contents
-            removed due to being referenced in rows above it in the
-            table), this method will return the item that would
-            normally be in the column, or None if the column in
-            question has been thus affected.
+        """
+        if len(self.entries) == 7:
+            # We don't want more than seven days!
+            raise IncorrectlySizedRowException
+        else:
+            entry = Entry(timeslot)
+            self.entries.append(entry)
+            self.columns.append(entry)
 
-            """
-            if column in self.see_above:
-                # Column has been removed due to compression
-                return None
-            else:
-                return self.entries[self.real_column(column)]
+    def compress(self, column):
+        """Removes the entry at the given column from the row, as
+        it is being covered by an entry in a row above.
+
+        """
+        self.entries.remove(self.columns[column])
+        self.columns[column] = None
+        self.see_above.append(column)
+
+    def real_column(self, column):
+        """Returns the actual index of a given column in the row. 
+
+        The reason the column number and entries index may be
+        different is because of row compression.
+
+        """
+        return column - \
+            len([x for x in self.see_above if x < column])
 
-        def inc_row_span(self, column):
-            """Increases the row span count of the given (logical)
-            column.
+    def get(self, column):
+        """Gets the entry at the given column.
 
-            This should be used when compressing the row below this
-            one in the table.
-            """
-            self.get(column).row_span += 1
+        If the row has been compressed (some of its contents
+        removed due to being referenced in rows above it in the
+        table), this method will return the item that would
+        normally be in the column, or None if the column in
+        question has been thus affected.
+
+        """
+        return self.columns[column]
+
+    def inc_row_span(self, column):
+        """Increases the row span count of the given (logical)
+        column.
+
+        This should be used when compressing the row below this
+        one in the table.
+        """
+        self.get(column).row_span += 1
+
+
+class WeekTable(object):
+    """A weekly schedule, in tabular form and ready to be outputted
+    in a template.
+
+    """
+
+    # Rows and entries are module-level classes, so that tabulated
+    # weeks can be pickled into the cache (Python 2 cannot pickle
+    # instances of nested classes); this keeps 'WeekTable.Row' working.
+    Row = Row
 
     def __init__(self):
         self.rows = []
+        # The most recent uncompressed entry in each column; these
+        # are the only entries a new row can be merged into.
+        self.live_entries = []
 
     def add(self, row):
         """Adds a new row, compressing it in the process.
@@ -106,32 +130,24 @@ class WeekTable(object):
         previous row, then the show is deleted from the inserted row
         and the row span of the other entry is incremented.
 
+        Compression takes constant time per column, as the table
+        remembers the last live entry of each column rather than
+        searching back through the rows above.
+
         """
-        if type(row) == WeekTable.Row:
-            entries = row.entries
-            # Compress row by merging where possible with above
-            # row
-            if len(self.rows) > 0:
-                for col, show in enumerate(row.entries[:]):
-                    slot = show.timeslot
-                    # If the show was in the previous two rows, the
-                    # row above will already have been compressed, and
-                    # this manifests itself in the above show being
-                    # None.
-                    # We need to keep going through the rows until we
-                    # hit an actual show, then see if it's the same
-                    # as the one we're adding, to decide whether to
-                    # compress the entry in this row too.
-                    for above_row in reversed(self.rows):
-                        above_show = above_row.get(col)
-                        if above_show is None: 
-                            continue
-                        elif slot is above_row.get(col).timeslot:
-                            # Compress by adding span to previous row
-                            row.entries.remove(show)
-                            row.see_above.append(col)
-                            above_row.inc_row_span(col)
-        
+        if type(row) == Row:
+            for col, entry in enumerate(row.columns[:]):
+                if col < len(self.live_entries):
+                    above = self.live_entries[col]
+                    if above.timeslot is entry.timeslot:
+                        # Compress by adding span to the live entry
+                        row.compress(col)
+                        above.row_span += 1
+                    else:
+                        self.live_entries[col] = entry
+                else:
+                    self.live_entries.append(entry)
+
             self.rows.append(row)
         else:
             raise TypeError("Cannot add things other than Rows.")
@@ -197,7 +213,7 @@ class WeekTable(object):
             else:
                 row_duration = shortest_duration
 
-            row = WeekTable.Row(row_date, row_duration)
+            row = Row(row_date, row_duration)
             # Now shove shows into the row
             for day_index, day in enumerate(week):
                 # Decide whether this row entry contains the start
@@ -2,3 +2,9 @@
 # models further up the list
 from uryplayer.models.podcast import Podcast
 from uryplayer.models.credit import PodcastCredit
+
+# Changes to podcast metadata invalidate metadata snapshots; this must
+# go last.
+from metadata.utils import snapshot
+from uryplayer.models.podcast import PodcastMetadata
+snapshot.watch(PodcastMetadata)
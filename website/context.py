@@ -4,10 +4,8 @@ Context processors used in the LASS project.
 """
 
 from django.conf import settings
-from django.utils import timezone
 
-from schedule.models import Term
-from schedule.utils.range import day
+from schedule.utils import now_playing
 
 from website.models import Website
 
@@ -30,16 +28,15 @@ def broadcast_info(request):
     broadcasting shows.
 
     """
-    now = timezone.now()
+    playing = now_playing.current()
 
     # If any other ways of discerning whether broadcasting is
     # occurring, add them here!
-    term = Term.of(now)
-    if not term:
-        preterm = Term.before(now)
+    term = playing.term
+    preterm = playing.preterm
 
     return {
-        'shows_on_air': day(now),
+        'shows_on_air': playing.shows(),
         # broadcasting is intended to be true when a schedule is
         # in play.
         'broadcasting': getattr(
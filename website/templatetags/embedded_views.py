@@ -9,6 +9,31 @@ class ViewNode(Node):
         self.url_or_view = url_or_view
         self.args = args
         self.kwargs = kwargs
+        # Targets already looked up by this node, keyed by urlconf and
+        # URL or view name, so the URLconf is only walked once for
+        # each.
+        self.targets = {}
+
+    def target(self, urlconf, url_or_view):
+        """
+        Returns the (view, args, kwargs) that the given URL resolves
+        to, or (view, None, None) for the given dotted view name.
+
+        Anything starting with a slash is taken to be a URL.
+        The lookup is remembered, and Django's resolver for the
+        urlconf is itself built only once.
+
+        """
+        key = (urlconf, url_or_view)
+        if key not in self.targets:
+            if url_or_view.startswith('/'):
+                target = urlresolvers.get_resolver(urlconf).resolve(
+                    url_or_view)
+            else:
+                target = (urlresolvers.get_callable(url_or_view, True),
+                          None, None)
+            self.targets[key] = target
+        return self.targets[key]
 
     def render(self, context):
         if 'request' not in context:
@@ -16,18 +41,15 @@ class ViewNode(Node):
         request = context['request']
 
         url_or_view = Variable(self.url_or_view).resolve(context)
+        urlconf = getattr(request, "urlconf", settings.ROOT_URLCONF)
         try:
-            urlconf = getattr(request, "urlconf", settings.ROOT_URLCONF)
-            resolver = urlresolvers.RegexURLResolver(r'^/', urlconf)
-            view, args, kwargs = resolver.resolve(url_or_view)
-        except:
-            view = urlresolvers.get_callable(url_or_view, True)
-            args = [Variable(arg).resolve(context) for arg in self.args]
-            kwargs = {}
-            for key, value in self.kwargs.items():
-                kwargs[key] = Variable(value).resolve(context)
+            view, args, kwargs = self.target(urlconf, url_or_view)
+            if args is None:
+                args = [Variable(arg).resolve(context) for arg in self.args]
+                kwargs = {}
+                for key, value in self.kwargs.items():
+                    kwargs[key] = Variable(value).resolve(context)
 
-        try:
             if callable(view):
                 return view(context['request'], *args, **kwargs).content
             raise Exception(view + ' is not callable')
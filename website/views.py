@@ -6,7 +6,7 @@ from website.models import Blog
 from django.shortcuts import render, redirect
 from django.utils import timezone
 
-from schedule.utils import range as s_range
+from schedule.utils import now_playing
 
 
 def front_page_banner(request, block_id=None):
@@ -49,7 +49,7 @@ def send_message(request):
 
     """
     # Current show
-    timeslot = s_range.day(limit=1)[0]
+    timeslot = now_playing.current().on_air
 
     if 'comments' not in request.POST:
         result = render(